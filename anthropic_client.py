@@ -0,0 +1,21 @@
+"""
+Shared Anthropic API client.
+"""
+from anthropic import Anthropic
+from typing import Dict
+from config import Config
+
+
+# Anthropic clients shared per API key so the underlying HTTP connection
+# pool (and its TLS sessions) is reused across extractors and generators
+_anthropic_clients: Dict[str, Anthropic] = {}
+
+
+def get_anthropic_client(api_key: str = None) -> Anthropic:
+    """Get the shared Anthropic client for an API key, creating it on first use."""
+    api_key = api_key or Config.ANTHROPIC_API_KEY
+    client = _anthropic_clients.get(api_key)
+    if client is None:
+        client = Anthropic(api_key=api_key)
+        _anthropic_clients[api_key] = client
+    return client
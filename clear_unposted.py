@@ -3,9 +3,9 @@
 Clear all unposted messages from the database.
 Use this to reset the schedule before re-fetching blog posts.
 """
-import sqlite3
 import sys
 from config import Config
+from database import get_connection
 
 
 def clear_unposted_messages():
@@ -16,28 +16,28 @@ def clear_unposted_messages():
     print("=" * 60)
     
     try:
-        with sqlite3.connect(db_path) as conn:
+        with get_connection(db_path) as conn:
             cursor = conn.cursor()
             
-            # Get counts before deletion
+            # Cheap existence probe: stops at the first unposted row
             cursor.execute("""
-                SELECT COUNT(*) FROM posted_messages 
+                SELECT 1 FROM posted_messages 
                 WHERE posted_to_linkedin = 0 OR posted_to_x = 0
+                LIMIT 1
             """)
-            unposted_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM posted_messages")
-            total_count = cursor.fetchone()[0]
+            if cursor.fetchone() is None:
+                print("✓ No unposted messages found. Nothing to clear.")
+                return
             
+            # Get counts before deletion (single pass over posted_messages)
             cursor.execute("""
-                SELECT COUNT(*) FROM posted_messages 
-                WHERE posted_to_linkedin = 1 AND posted_to_x = 1
+                SELECT 
+                    COUNT(*),
+                    COALESCE(SUM(CASE WHEN posted_to_linkedin = 1 AND posted_to_x = 1 THEN 1 ELSE 0 END), 0),
+                    COALESCE(SUM(CASE WHEN posted_to_linkedin = 0 OR posted_to_x = 0 THEN 1 ELSE 0 END), 0)
+                FROM posted_messages
             """)
-            posted_count = cursor.fetchone()[0]
-            
-            if unposted_count == 0:
-                print("✓ No unposted messages found. Nothing to clear.")
-                return
+            total_count, posted_count, unposted_count = cursor.fetchone()
             
             print(f"Current status:")
             print(f"  Total messages: {total_count}")
@@ -56,8 +56,9 @@ def clear_unposted_messages():
             # Clean up blog posts with no remaining messages
             cursor.execute("""
                 DELETE FROM blog_posts 
-                WHERE id NOT IN (
-                    SELECT DISTINCT blog_post_id FROM posted_messages
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM posted_messages 
+                    WHERE posted_messages.blog_post_id = blog_posts.id
                 )
             """)
             
@@ -71,11 +72,12 @@ def clear_unposted_messages():
             print()
             
             # Show final counts
-            cursor.execute("SELECT COUNT(*) FROM posted_messages")
-            remaining = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM blog_posts")
-            posts_remaining = cursor.fetchone()[0]
+            cursor.execute("""
+                SELECT 
+                    (SELECT COUNT(*) FROM posted_messages),
+                    (SELECT COUNT(*) FROM blog_posts)
+            """)
+            remaining, posts_remaining = cursor.fetchone()
             
             print(f"Remaining in database:")
             print(f"  Messages: {remaining}")
@@ -97,15 +99,16 @@ def clear_all_messages():
     print("=" * 60)
     
     try:
-        with sqlite3.connect(db_path) as conn:
+        with get_connection(db_path) as conn:
             cursor = conn.cursor()
             
             # Get counts
-            cursor.execute("SELECT COUNT(*) FROM posted_messages")
-            total_messages = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM blog_posts")
-            total_posts = cursor.fetchone()[0]
+            cursor.execute("""
+                SELECT 
+                    (SELECT COUNT(*) FROM posted_messages),
+                    (SELECT COUNT(*) FROM blog_posts)
+            """)
+            total_messages, total_posts = cursor.fetchone()
             
             if total_messages == 0:
                 print("✓ Database is already empty.")
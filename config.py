@@ -46,6 +46,8 @@ class Config:
     
     # Database Configuration
     DATABASE_PATH = os.getenv('DATABASE_PATH', './data/posts.db')
+    # Last feed fetch (ETag/Last-Modified and parsed posts) for conditional GETs
+    FEED_CACHE_PATH = os.getenv('FEED_CACHE_PATH', './data/feed_cache.json')
     
     # Schedule Configuration
     POSTS_PER_BLOG = int(os.getenv('POSTS_PER_BLOG', 5))
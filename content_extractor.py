@@ -1,22 +1,62 @@
 """
 AI-powered content extraction using Anthropic Claude API.
 """
-import os
-from anthropic import Anthropic
+import hashlib
+import re
 from typing import List
+from anthropic_client import get_anthropic_client
 from config import Config
 
 
+# Numbered list item such as "1. text" (up to three digits, like the model emits)
+_NUMBERED_LINE_RE = re.compile(r'^\d{1,3}\.\s*(.*)')
+
+_EXTRACTION_PROMPT_TEMPLATE = """You are a social media content strategist. I have a blog post that I want to promote on LinkedIn and X (Twitter) over the course of a week with daily posts.
+
+Blog Title: {title}
+
+Blog Content:
+{content}
+
+Please extract {num_messages} distinct, engaging messaging points from this blog post. Each message should follow all of these:
+1. Ensure using tight sentences, high scannability, and a clear opening hook.
+2. Keep the length between 100–200 words to balance depth with feed-friendly readability.
+3. Lead with one surprising insight, metric, or vivid analogy that immediately earns attention.
+4. Maintain an engaging, authoritative, professional tone suitable for executives and senior engineers.
+5. Include a clear call-to-action or thought-provoking question that invites responses or reflection.
+6. Deliver meaningful value through concise detail, avoiding repetition while keeping each sentence additive.
+7. Blend business language (risk, ROI, operational maturity) with technical language (certificates, trust stores, automation) to appeal to both executives and engineers.
+8. Use a problem-to-solution arc: begin with a recognizable pain point, reveal the underlying cause, and show how the insight resolves it.
+9. Follow a narrative structure: open with a relatable scenario or single vivid moment, build tension around consequences or risks, and close with the key takeaway or lesson learned.
+10. Prefer high-signal metaphors or mental models that make complex technical concepts instantly clear and shareable.
+
+Format your response as a numbered list (1. 2. 3. etc.) with one message per line.
+Do not include hashtags or emojis - I will add those when posting.
+Do not include the link to the blog post - I will add that separately.
+
+Messages:"""
+
+
 class ContentExtractor:
     """Extract key messaging points from blog posts using AI."""
     
-    def __init__(self, api_key: str = None):
-        """Initialize the content extractor with Anthropic API."""
+    MODEL = "claude-sonnet-4-20250514"
+    
+    def __init__(self, api_key: str = None, db=None):
+        """
+        Initialize the content extractor with Anthropic API.
+        
+        Args:
+            api_key: Anthropic API key
+            db: Optional Database used to cache extraction results across runs
+        """
         self.api_key = api_key or Config.ANTHROPIC_API_KEY
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = get_anthropic_client(self.api_key)
+        self.db = db
     
     def extract_daily_messages(self, title: str, content: str, 
-                              num_messages: int = 7) -> List[str]:
+                              num_messages: int = 7,
+                              use_cache: bool = True) -> List[str]:
         """
         Extract key messaging points from a blog post.
         
@@ -24,15 +64,27 @@ class ContentExtractor:
             title: Blog post title
             content: Blog post content
             num_messages: Number of messages to extract (default 7 for daily posting)
+            use_cache: Reuse a previous result for the same prompt if a
+                database was provided (disable to always get fresh messages)
             
         Returns:
             List of extracted messages suitable for social media posting
         """
         prompt = self._create_extraction_prompt(title, content, num_messages)
         
+        cache_key = None
+        if self.db is not None and use_cache:
+            cache_key = hashlib.blake2b(
+                f"{self.MODEL}\0{prompt}".encode('utf-8'), digest_size=16
+            ).hexdigest()
+            cached = self.db.get_cached_extraction(cache_key)
+            if cached:
+                print(f"Using cached extraction ({len(cached)} messages)")
+                return cached[:num_messages]
+        
         try:
             message = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
+                model=self.MODEL,
                 max_tokens=2000,
                 temperature=0.7,
                 messages=[
@@ -48,7 +100,11 @@ class ContentExtractor:
             if len(messages) < num_messages:
                 print(f"Warning: Only extracted {len(messages)} messages, expected {num_messages}")
             
-            return messages[:num_messages]
+            messages = messages[:num_messages]
+            if cache_key and messages:
+                self.db.save_cached_extraction(cache_key, messages)
+            
+            return messages
         
         except Exception as e:
             print(f"Error extracting content: {e}")
@@ -57,61 +113,42 @@ class ContentExtractor:
     def _create_extraction_prompt(self, title: str, content: str, 
                                  num_messages: int) -> str:
         """Create the prompt for content extraction."""
-        return f"""You are a social media content strategist. I have a blog post that I want to promote on LinkedIn and X (Twitter) over the course of a week with daily posts.
-
-Blog Title: {title}
-
-Blog Content:
-{content}  # Limit content to avoid token limits
-
-Please extract {num_messages} distinct, engaging messaging points from this blog post. Each message should follow all of these:
-1. Ensure using tight sentences, high scannability, and a clear opening hook.
-2. Keep the length between 100–200 words to balance depth with feed-friendly readability.
-3. Lead with one surprising insight, metric, or vivid analogy that immediately earns attention.
-4. Maintain an engaging, authoritative, professional tone suitable for executives and senior engineers.
-5. Include a clear call-to-action or thought-provoking question that invites responses or reflection.
-6. Deliver meaningful value through concise detail, avoiding repetition while keeping each sentence additive.
-7. Blend business language (risk, ROI, operational maturity) with technical language (certificates, trust stores, automation) to appeal to both executives and engineers.
-8. Use a problem-to-solution arc: begin with a recognizable pain point, reveal the underlying cause, and show how the insight resolves it.
-9. Follow a narrative structure: open with a relatable scenario or single vivid moment, build tension around consequences or risks, and close with the key takeaway or lesson learned.
-10. Prefer high-signal metaphors or mental models that make complex technical concepts instantly clear and shareable.
-
-Format your response as a numbered list (1. 2. 3. etc.) with one message per line.
-Do not include hashtags or emojis - I will add those when posting.
-Do not include the link to the blog post - I will add that separately.
-
-Messages:"""
+        return _EXTRACTION_PROMPT_TEMPLATE.format(
+            title=title,
+            content=content,
+            num_messages=num_messages
+        )
     
     def _parse_messages(self, response_text: str) -> List[str]:
         """Parse the AI response into individual messages."""
         messages = []
         lines = response_text.strip().split('\n')
         
-        current_message = ""
+        # Collect the lines of the current message and join once at the end
+        current_parts = []
         for line in lines:
             line = line.strip()
             if not line:
                 continue
             
             # Check if this is a numbered line (e.g., "1.", "2.", etc.)
-            if line[0].isdigit() and '.' in line[:4]:
+            match = _NUMBERED_LINE_RE.match(line)
+            if match:
                 # Save previous message if exists
+                current_message = " ".join(current_parts).strip()
                 if current_message:
-                    messages.append(current_message.strip())
+                    messages.append(current_message)
                 
-                # Start new message (remove the number and dot)
-                parts = line.split('.', 1)
-                if len(parts) > 1:
-                    current_message = parts[1].strip()
-                else:
-                    current_message = line
+                # Start new message (without the number and dot)
+                current_parts = [match.group(1)]
             else:
                 # Continue current message
-                current_message += " " + line
+                current_parts.append(line)
         
         # Add the last message
+        current_message = " ".join(current_parts).strip()
         if current_message:
-            messages.append(current_message.strip())
+            messages.append(current_message)
         
         return messages
     
@@ -137,40 +174,28 @@ Messages:"""
         
         elif platform == 'x':
             # Check if Premium account is enabled for longer messages
-            # Reload from environment to get current value
-            is_premium = os.getenv('X_PREMIUM_ACCOUNT', 'true').lower() == 'true'
+            is_premium = Config.X_PREMIUM_ACCOUNT
             
-            # Calculate word limits based on account type
-            if is_premium:
-                # Premium accounts: allow up to ~5000 words (well within 25,000 char limit)
-                max_words = 5000
-            else:
-                # Standard accounts: limit to ~35 words to stay within 280 character limit
-                max_words = 35
+            char_limit = 25000 if is_premium else 280
+            hashtag_limit = 10 if is_premium else 3  # More hashtags allowed for Premium
+            hashtag_str = " ".join(f"#{tag}" for tag in hashtags[:hashtag_limit]) if hashtags else ""
             
-            # For standard accounts, truncate message before adding URL and hashtags
+            # For standard accounts, truncate message so that the URL and
+            # hashtags still fit within the 280 character limit
             if not is_premium:
-                # Account for URL length and some buffer for hashtags
-                url_length = len(blog_url) + 4  # URL + "\n\n"
-                hashtag_buffer = 50  # Buffer for potential hashtags
-                available_chars = 280 - url_length - hashtag_buffer
+                available_chars = char_limit - len(blog_url) - 2  # "\n\n" + URL
+                if hashtag_str and available_chars - len(hashtag_str) - 1 > 3:
+                    available_chars -= len(hashtag_str) + 1  # "\n" + hashtags
                 
-                # Truncate the original message to fit
                 if len(message) > available_chars:
-                    message = message[:available_chars-3] + "..."
+                    message = message[:max(available_chars - 3, 0)].rstrip() + "..."
             
             # Create enhanced message with URL
             enhanced = f"{message}\n\n{blog_url}"
             
             # Add hashtags if they fit within character limits
-            if hashtags:
-                hashtag_limit = 10 if is_premium else 3  # More hashtags allowed for Premium
-                hashtag_str = " ".join(f"#{tag}" for tag in hashtags[:hashtag_limit])
-                
-                # Check if hashtags fit within character limits
-                char_limit = 25000 if is_premium else 280
-                if len(enhanced) + len(hashtag_str) + 2 <= char_limit:
-                    enhanced += "\n" + hashtag_str
+            if hashtag_str and len(enhanced) + len(hashtag_str) + 1 <= char_limit:
+                enhanced += "\n" + hashtag_str
             
             return enhanced
         
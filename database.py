@@ -1,30 +1,157 @@
 """
 Database module for tracking blog posts and their extracted messages.
 """
+import atexit
+import os
+import random
 import sqlite3
 import json
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Set, Tuple
 from config import Config
 from scheduler import PostScheduler
 from image_generator import ImageGenerator
 
 
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite connection with the project's standard PRAGMAs applied.
+    
+    WAL lets readers proceed while a writer commits and, with
+    synchronous=NORMAL, avoids an fsync per commit. Checkpointing is left
+    to SQLite's automatic checkpoint (and Database.close). All but
+    journal_mode are per-connection settings, so they are applied on
+    every open.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")  # ~20 MB
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
 class Database:
     """Database manager for storing post information and tracking posted messages."""
     
+    # Hot-path statements, kept as stable strings so sqlite3's statement
+    # cache reuses the prepared statement on every call
+    NEXT_MESSAGE_SQL = """
+        SELECT 
+            pm.id,
+            pm.blog_post_id,
+            pm.message_index,
+            pm.message_text,
+            pm.image_url,
+            pm.scheduled_for,
+            pm.posted_to_linkedin,
+            pm.posted_to_x,
+            bp.title,
+            bp.post_url
+        FROM posted_messages pm
+        JOIN blog_posts bp ON pm.blog_post_id = bp.id
+        WHERE pm.posted_to_linkedin = 0 AND pm.posted_to_x = 0
+          AND pm.scheduled_for IS NOT NULL
+          -- ISO-8601 strings sort chronologically, so a bare date works as
+          -- the lower bound and the partial index can range-scan
+          AND pm.scheduled_for >= ?
+        ORDER BY pm.scheduled_for ASC
+        LIMIT 1
+    """
+    
+    # Timestamps are produced by SQLite at write time, in the same local
+    # ISO-8601 shape datetime.now().isoformat() gave (millisecond precision)
+    MARK_POSTED_TO_LINKEDIN_SQL = """
+        UPDATE posted_messages 
+        SET posted_to_linkedin = 1, posted_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+        WHERE id = ?
+        RETURNING posted_to_linkedin, posted_to_x, image_url
+    """
+    
+    MARK_POSTED_TO_X_SQL = """
+        UPDATE posted_messages 
+        SET posted_to_x = 1, posted_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+        WHERE id = ?
+        RETURNING posted_to_linkedin, posted_to_x, image_url
+    """
+    
+    INSERT_MESSAGE_SQL = """
+        INSERT INTO posted_messages 
+        (blog_post_id, message_index, message_text, image_url, scheduled_for)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    
+    # Bump whenever init_database's tables, indexes or migrations change
+    SCHEMA_VERSION = 2
+    
+    # Extraction/regeneration results older than this are dropped at startup;
+    # the cache only needs to outlive an interrupted run and its retry
+    EXTRACTION_CACHE_MAX_AGE_DAYS = 30
+    
+    # Messages are removed together with their blog post (ON DELETE CASCADE)
+    POSTED_MESSAGES_TABLE_SQL = """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            blog_post_id INTEGER NOT NULL,
+            message_index INTEGER NOT NULL,
+            message_text TEXT NOT NULL,
+            image_url TEXT,
+            scheduled_for TEXT,
+            posted_to_linkedin BOOLEAN DEFAULT 0,
+            posted_to_x BOOLEAN DEFAULT 0,
+            posted_at TEXT,
+            FOREIGN KEY (blog_post_id) REFERENCES blog_posts(id) ON DELETE CASCADE,
+            -- Also serves as the index for blog_post_id lookups
+            UNIQUE(blog_post_id, message_index)
+        )
+    """
+    
     def __init__(self, db_path: str = None):
         """Initialize database connection."""
         self.db_path = db_path or Config.DATABASE_PATH
         self.scheduler = PostScheduler()
         self.image_generator = ImageGenerator() if Config.GENERATE_IMAGES > 0 else None
+        # Single long-lived connection reused by every method; `with self.conn`
+        # scopes a transaction (commit on success, rollback on error).
+        self.conn = get_connection(self.db_path)
+        # Parsed scheduled_for values, loaded lazily by get_all_scheduled_times
+        # and kept in step by the methods that add, move or remove messages
+        self._scheduled_times_cache: Optional[List[datetime]] = None
         self.init_database()
+        self.prune_extraction_cache()
+        # Make sure the WAL is folded back into the main file before exit,
+        # since the database file is carried between workflow runs.
+        atexit.register(self.close)
+    
+    def close(self):
+        """Update planner statistics, checkpoint the WAL and close the connection."""
+        if self.conn is not None:
+            # Refresh planner statistics (ANALYZE) for tables whose queries
+            # would benefit, e.g. after the partial index is first created
+            self.conn.execute("PRAGMA optimize")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
+            self.conn = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def init_database(self):
-        """Create database tables if they don't exist."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Create or migrate database tables unless the schema is already current."""
+        with self.conn as conn:
             cursor = conn.cursor()
             
+            # Skip all DDL when the file already carries the current schema
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] == self.SCHEMA_VERSION:
+                return
+            
             # Table for blog posts
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS blog_posts (
@@ -33,38 +160,135 @@ class Database:
                     title TEXT NOT NULL,
                     content TEXT NOT NULL,
                     published_date TEXT NOT NULL,
-                    fetched_at TEXT NOT NULL,
-                    messages_json TEXT NOT NULL
+                    fetched_at TEXT NOT NULL
                 )
             """)
             
+            # Messages live in posted_messages; drop the redundant JSON copy
+            # from databases created before it was removed
+            cursor.execute("PRAGMA table_info(blog_posts)")
+            if 'messages_json' in [col[1] for col in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE blog_posts DROP COLUMN messages_json")
+            
             # Table for tracking posted messages
+            cursor.execute(self.POSTED_MESSAGES_TABLE_SQL.format(table='posted_messages'))
+            
+            # Columns added after the first release
+            cursor.execute("PRAGMA table_info(posted_messages)")
+            columns = [col[1] for col in cursor.fetchall()]
+            for column in ('scheduled_for', 'image_url'):
+                if column not in columns:
+                    print(f"Adding {column} column to posted_messages...")
+                    cursor.execute(f"ALTER TABLE posted_messages ADD COLUMN {column} TEXT")
+            
+            self._migrate_posted_messages_cascade(conn)
+
+            # Partial index over the unposted backlog, ordered by schedule.
+            # Lets get_next_message_to_post / get_unposted_messages walk only
+            # pending rows in scheduled order instead of scanning and sorting.
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS posted_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    blog_post_id INTEGER NOT NULL,
-                    message_index INTEGER NOT NULL,
-                    message_text TEXT NOT NULL,
-                    image_url TEXT,
-                    scheduled_for TEXT,
-                    posted_to_linkedin BOOLEAN DEFAULT 0,
-                    posted_to_x BOOLEAN DEFAULT 0,
-                    posted_at TEXT,
-                    FOREIGN KEY (blog_post_id) REFERENCES blog_posts(id),
-                    UNIQUE(blog_post_id, message_index)
+                CREATE INDEX IF NOT EXISTS idx_posted_messages_unposted
+                ON posted_messages(scheduled_for)
+                WHERE posted_to_linkedin = 0 AND posted_to_x = 0
+            """)
+
+            # Cache of Claude extraction results, keyed by a hash of model + prompt
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    messages_json TEXT NOT NULL,
+                    created_at TEXT NOT NULL
                 )
             """)
-            
+
+            cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
             conn.commit()
     
     def get_post_id_by_url(self, url: str) -> Optional[int]:
         """Get post ID by URL if it exists."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT id FROM blog_posts WHERE post_url = ?", (url,))
             result = cursor.fetchone()
             return result[0] if result else None
     
+    def get_processed_urls(self) -> Set[str]:
+        """Get the URLs of all stored blog posts."""
+        with self.conn as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT post_url FROM blog_posts")
+            return {row[0] for row in cursor.fetchall()}
+    
+    def _migrate_posted_messages_cascade(self, conn: sqlite3.Connection):
+        """
+        Rebuild posted_messages if it predates ON DELETE CASCADE.
+        
+        SQLite cannot alter a foreign key in place, so the table is copied
+        into a new one with the current schema inside a single transaction.
+        """
+        foreign_keys = conn.execute("PRAGMA foreign_key_list(posted_messages)").fetchall()
+        # Column 6 of foreign_key_list is the ON DELETE action
+        if all(fk[6] == 'CASCADE' for fk in foreign_keys):
+            return
+        
+        print("Migrating posted_messages to ON DELETE CASCADE...")
+        conn.commit()
+        # Must be toggled outside a transaction; keeps the copy from
+        # tripping FK checks on legacy orphaned rows
+        conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            conn.execute("BEGIN")
+            conn.execute(self.POSTED_MESSAGES_TABLE_SQL.format(table='posted_messages_new'))
+            new_columns = {col[1] for col in conn.execute("PRAGMA table_info(posted_messages_new)")}
+            columns = ", ".join(
+                col[1] for col in conn.execute("PRAGMA table_info(posted_messages)")
+                if col[1] in new_columns
+            )
+            conn.execute(
+                f"INSERT INTO posted_messages_new ({columns}) "
+                f"SELECT {columns} FROM posted_messages"
+            )
+            conn.execute("DROP TABLE posted_messages")
+            conn.execute("ALTER TABLE posted_messages_new RENAME TO posted_messages")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA foreign_keys=ON")
+    
+    def get_cached_extraction(self, cache_key: str) -> Optional[List[str]]:
+        """Get previously extracted messages for a cache key, if any."""
+        with self.conn as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT messages_json FROM extraction_cache WHERE cache_key = ?",
+                (cache_key,)
+            )
+            row = cursor.fetchone()
+            return json.loads(row[0]) if row else None
+    
+    def prune_extraction_cache(self):
+        """Delete cached extraction results older than EXTRACTION_CACHE_MAX_AGE_DAYS."""
+        with self.conn as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM extraction_cache
+                WHERE created_at < strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime', ?)
+            """, (f"-{self.EXTRACTION_CACHE_MAX_AGE_DAYS} days",))
+            conn.commit()
+    
+    def save_cached_extraction(self, cache_key: str, messages: List[str]):
+        """Store extracted messages under a cache key."""
+        with self.conn as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT OR REPLACE INTO extraction_cache 
+                (cache_key, messages_json, created_at)
+                VALUES (?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+            """, (cache_key, json.dumps(messages)))
+            conn.commit()
+    
     def save_blog_post(self, url: str, title: str, content: str, 
                       published_date: str, messages: List[str]) -> Optional[int]:
         """
@@ -73,7 +297,7 @@ class Database:
         Returns:
             Post ID if saved successfully, None if scheduling not possible
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             
             # Check if post already exists
@@ -100,21 +324,37 @@ class Database:
                 print(f"   Schedule is full. This post will be retried on next fetch.")
                 return None
             
-            # Insert new post
+            # Generate images before writing so the write transaction isn't
+            # held open across the image API calls
+            image_urls = self._generate_images(title, messages)
+            
+            # Insert new post; the URL check above ran before the slow image
+            # generation, so let the UNIQUE constraint settle any race since
             cursor.execute("""
                 INSERT INTO blog_posts 
-                (post_url, title, content, published_date, fetched_at, messages_json)
-                VALUES (?, ?, ?, ?, ?, ?)
+                (post_url, title, content, published_date, fetched_at)
+                VALUES (?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+                ON CONFLICT(post_url) DO NOTHING
+                RETURNING id
             """, (
                 url,
                 title,
                 content,
-                published_date,
-                datetime.now().isoformat(),
-                json.dumps(messages)
+                published_date
             ))
+            inserted = cursor.fetchone()
             
-            post_id = cursor.lastrowid
+            if not inserted:
+                # Another run stored the post first; its images aren't used
+                for image_path in image_urls:
+                    if image_path and os.path.isfile(image_path):
+                        try:
+                            os.remove(image_path)
+                        except OSError as e:
+                            print(f"Warning: Failed to remove image file: {e}")
+                return self.get_post_id_by_url(url)
+            
+            post_id = inserted[0]
             
             # Schedule the messages intelligently
             # First message is within max_days, subsequent messages can extend beyond
@@ -124,39 +364,70 @@ class Database:
                 # No max_days constraint - allow messages to extend beyond if needed
             )
             
-            # Insert messages with scheduled times and generate images
-            for idx, (message, scheduled_time) in enumerate(zip(messages, scheduled_times)):
-                # Generate image based on probability
-                image_url = None
-                if self.image_generator and Config.GENERATE_IMAGES > 0:
-                    import random
-                    if random.random() < Config.GENERATE_IMAGES:
-                        try:
-                            image_url = self.image_generator.generate_image_for_message(
-                                blog_title=title,
-                                message_text=message,
-                                message_id=None  # Will get actual ID after insert
-                            )
-                        except Exception as e:
-                            print(f"Warning: Image generation failed for message {idx}: {e}")
-                
-                cursor.execute("""
-                    INSERT INTO posted_messages 
-                    (blog_post_id, message_index, message_text, image_url, scheduled_for)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (post_id, idx, message, image_url, scheduled_time.isoformat()))
+            # Insert all messages in one batch (one prepared statement, N binds)
+            cursor.executemany(self.INSERT_MESSAGE_SQL, (
+                (post_id, idx, message, image_url, scheduled_time.isoformat())
+                for idx, (message, scheduled_time, image_url)
+                in enumerate(zip(messages, scheduled_times, image_urls))
+            ))
             
             conn.commit()
+            self._add_scheduled_times(scheduled_times)
             
             # Print scheduling summary
             print(f"\n{self.scheduler.format_schedule_summary(scheduled_times)}")
             
             return post_id
     
+    def _should_generate_image(self) -> bool:
+        """Decide, with probability Config.GENERATE_IMAGES, whether a message gets an image."""
+        if not self.image_generator or Config.GENERATE_IMAGES <= 0:
+            return False
+        return random.random() < Config.GENERATE_IMAGES
+    
+    def _generate_image(self, blog_title: str, message: str) -> Optional[str]:
+        """
+        Generate an image for a message.
+        
+        Returns:
+            Image path, or None if generation failed
+        """
+        try:
+            return self.image_generator.generate_image_for_message(
+                blog_title=blog_title,
+                message_text=message,
+                message_id=None  # Will get actual ID after insert
+            )
+        except Exception as e:
+            print(f"Warning: Image generation failed: {e}")
+            return None
+    
+    def _generate_images(self, blog_title: str, messages: List[str]) -> List[Optional[str]]:
+        """
+        Generate images for a randomly chosen subset of messages.
+        
+        Returns:
+            Image path (or None) for each message, in message order
+        """
+        image_urls = [None] * len(messages)
+        to_generate = [idx for idx in range(len(messages)) if self._should_generate_image()]
+        if not to_generate:
+            return image_urls
+        
+        try:
+            generated = self.image_generator.generate_images_for_messages(
+                blog_title, [messages[idx] for idx in to_generate]
+            )
+        except Exception as e:
+            print(f"Warning: Image generation failed: {e}")
+            return image_urls
+        
+        for idx, image_url in zip(to_generate, generated):
+            image_urls[idx] = image_url
+        return image_urls
+    
     def get_next_message_to_post(self) -> Optional[Dict]:
         """Get the next message that needs to be posted (based on schedule)."""
-        import os
-        
         # Debug: Show database file info
         print(f"\n📂 Database Info:")
         print(f"   Path: {self.db_path}")
@@ -166,112 +437,19 @@ class Database:
             print(f"   Modified: {datetime.fromtimestamp(os.path.getmtime(self.db_path))}")
         print()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             
-            # Get total count of all messages
-            cursor.execute("SELECT COUNT(*) FROM posted_messages")
-            total_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM posted_messages WHERE posted_to_linkedin = 1 AND posted_to_x = 1")
-            fully_posted = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM posted_messages WHERE posted_to_linkedin = 0 AND posted_to_x = 0")
-            unposted = cursor.fetchone()[0]
-            
-            print(f"📊 Database Stats:")
-            print(f"   Total messages: {total_count}")
-            print(f"   Fully posted (L+X): {fully_posted}")
-            print(f"   Unposted (neither): {unposted}")
-            
             # Get current date in Eastern timezone for comparison
-            from pytz import timezone
-            eastern = timezone('US/Eastern')
-            current_time = datetime.now(eastern)
+            current_time = datetime.now(self.scheduler.eastern)
             current_date = current_time.date().isoformat()  # e.g., '2025-10-29'
             
-            # Debug: Show latest 50 messages by ID (all messages, including those without schedule)
-            print(f"\n🔍 Latest 50 messages (highest IDs):")
-            cursor.execute("""
-                SELECT 
-                    pm.id,
-                    pm.scheduled_for,
-                    pm.posted_to_linkedin,
-                    pm.posted_to_x
-                FROM posted_messages pm
-                ORDER BY pm.id DESC
-                LIMIT 50
-            """)
-            
-            debug_messages = cursor.fetchall()
-            if debug_messages:
-                print(f"   Found {len(debug_messages)} messages:")
-                for msg_id, sched, linkedin, x in debug_messages:
-                    print(f"   - ID {msg_id}: {sched} (L:{linkedin}, X:{x})")
-            else:
-                print(f"   No messages found in database!")
-            print()
-            
-            print(f"\n🔍 Querying for unposted messages with scheduled_for >= {current_date}...")
-            cursor.execute("""
-                SELECT 
-                    pm.id,
-                    pm.blog_post_id,
-                    pm.message_index,
-                    pm.message_text,
-                    pm.image_url,
-                    pm.scheduled_for,
-                    pm.posted_to_linkedin,
-                    pm.posted_to_x,
-                    bp.title,
-                    bp.post_url
-                FROM posted_messages pm
-                JOIN blog_posts bp ON pm.blog_post_id = bp.id
-                WHERE pm.posted_to_linkedin = 0 AND pm.posted_to_x = 0
-                  AND pm.scheduled_for IS NOT NULL
-                  AND date(substr(pm.scheduled_for, 1, 10)) >= ?
-                ORDER BY pm.scheduled_for ASC
-                LIMIT 1
-            """, (current_date,))
-            
-            row = cursor.fetchone()
+            print(f"🔍 Querying for unposted messages with scheduled_for >= {current_date}...")
+            row = conn.execute(self.NEXT_MESSAGE_SQL, (current_date,)).fetchone()
             if not row:
-                print(f"❌ Query returned no results")
-                print(f"   Filters: posted_to_linkedin=0 AND posted_to_x=0")
-                print(f"   AND scheduled_for IS NOT NULL")
-                print(f"   AND date(substr(scheduled_for, 1, 10)) >= '{current_date}'")
-                
-                # Debug: Check if there are ANY unposted messages with scheduled_for
-                cursor.execute("""
-                    SELECT COUNT(*) FROM posted_messages 
-                    WHERE posted_to_linkedin = 0 AND posted_to_x = 0
-                      AND scheduled_for IS NOT NULL
-                """)
-                count = cursor.fetchone()[0]
-                print(f"   Total unposted messages with scheduled_for: {count}")
-                
-                # Debug: Check if date extraction is working and why messages aren't matching
-                cursor.execute("""
-                    SELECT 
-                        id, 
-                        scheduled_for, 
-                        substr(scheduled_for, 1, 10) as date_part,
-                        date(substr(scheduled_for, 1, 10)) as sqlite_date
-                    FROM posted_messages 
-                    WHERE posted_to_linkedin = 0 AND posted_to_x = 0
-                      AND scheduled_for IS NOT NULL
-                    ORDER BY scheduled_for ASC
-                    LIMIT 10
-                """)
-                samples = cursor.fetchall()
-                if samples:
-                    print(f"   Next 10 unposted messages (by scheduled_for):")
-                    for msg_id, sched, date_part, sqlite_date in samples:
-                        passes_filter = sqlite_date >= current_date
-                        status = "✅" if passes_filter else "❌"
-                        print(f"      {status} ID {msg_id}: {sched} → date_part='{date_part}', sqlite_date='{sqlite_date}'")
-                        print(f"         Comparison: '{sqlite_date}' >= '{current_date}' = {passes_filter}")
-                
+                # Diagnostics only run when nothing was found, keeping the
+                # common path to a single query
+                self._print_no_message_diagnostics(cursor, current_date)
                 return None
             
             # row[5] is scheduled_for, not row[4]!
@@ -304,78 +482,178 @@ class Database:
                 'blog_url': row[9]
             }
     
-    def mark_posted_to_linkedin(self, message_id: int):
-        """Mark a message as posted to LinkedIn."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE posted_messages 
-                SET posted_to_linkedin = 1, posted_at = ?
-                WHERE id = ?
-            """, (datetime.now().isoformat(), message_id))
-            conn.commit()
-            # Force write to disk
-            cursor.execute("PRAGMA wal_checkpoint(FULL)")
-            conn.commit()
+    def _print_no_message_diagnostics(self, cursor: sqlite3.Cursor, current_date: str):
+        """Print database stats and recent messages to explain an empty next-message query."""
+        print(f"❌ Query returned no results")
+        print(f"   Filters: posted_to_linkedin=0 AND posted_to_x=0")
+        print(f"   AND scheduled_for IS NOT NULL")
+        print(f"   AND scheduled_for >= '{current_date}'")
+        
+        cursor.execute("""
+            SELECT 
+                COUNT(*),
+                SUM(CASE WHEN posted_to_linkedin = 1 AND posted_to_x = 1 THEN 1 ELSE 0 END),
+                SUM(CASE WHEN posted_to_linkedin = 0 AND posted_to_x = 0 THEN 1 ELSE 0 END),
+                SUM(CASE WHEN posted_to_linkedin = 0 AND posted_to_x = 0
+                          AND scheduled_for IS NOT NULL THEN 1 ELSE 0 END)
+            FROM posted_messages
+        """)
+        total_count, fully_posted, unposted, unposted_scheduled = (
+            value or 0 for value in cursor.fetchone()
+        )
+        
+        print(f"\n📊 Database Stats:")
+        print(f"   Total messages: {total_count}")
+        print(f"   Fully posted (L+X): {fully_posted}")
+        print(f"   Unposted (neither): {unposted}")
+        print(f"   Unposted with scheduled_for: {unposted_scheduled}")
+        
+        # Show latest 50 messages by ID (all messages, including those without schedule)
+        print(f"\n🔍 Latest 50 messages (highest IDs):")
+        cursor.execute("""
+            SELECT 
+                pm.id,
+                pm.scheduled_for,
+                pm.posted_to_linkedin,
+                pm.posted_to_x
+            FROM posted_messages pm
+            ORDER BY pm.id DESC
+            LIMIT 50
+        """)
+        
+        debug_messages = cursor.fetchall()
+        if debug_messages:
+            print(f"   Found {len(debug_messages)} messages:")
+            for msg_id, sched, linkedin, x in debug_messages:
+                print(f"   - ID {msg_id}: {sched} (L:{linkedin}, X:{x})")
+        else:
+            print(f"   No messages found in database!")
+        
+        # Show the earliest unposted messages and why they don't match
+        cursor.execute("""
+            SELECT id, scheduled_for
+            FROM posted_messages 
+            WHERE posted_to_linkedin = 0 AND posted_to_x = 0
+              AND scheduled_for IS NOT NULL
+            ORDER BY scheduled_for ASC
+            LIMIT 10
+        """)
+        samples = cursor.fetchall()
+        if samples:
+            print(f"\n   Next 10 unposted messages (by scheduled_for):")
+            for msg_id, sched in samples:
+                passes_filter = sched >= current_date
+                status = "✅" if passes_filter else "❌"
+                print(f"      {status} ID {msg_id}: {sched}")
+                print(f"         Comparison: '{sched}' >= '{current_date}' = {passes_filter}")
+        print()
     
-    def mark_posted_to_x(self, message_id: int):
-        """Mark a message as posted to X."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE posted_messages 
-                SET posted_to_x = 1, posted_at = ?
-                WHERE id = ?
-            """, (datetime.now().isoformat(), message_id))
-            conn.commit()
-            # Force write to disk
-            cursor.execute("PRAGMA wal_checkpoint(FULL)")
+    def _mark_posted(self, sql: str, message_id: int) -> Optional[Dict]:
+        """Run one of the MARK_POSTED_* statements and return the message's updated status."""
+        with self.conn as conn:
+            rows = conn.execute(sql, (message_id,)).fetchall()
             conn.commit()
+            if not rows:
+                return None
+            return {
+                'posted_to_linkedin': bool(rows[0][0]),
+                'posted_to_x': bool(rows[0][1]),
+                'image_url': rows[0][2],
+            }
+    
+    def mark_posted_to_linkedin(self, message_id: int) -> Optional[Dict]:
+        """
+        Mark a message as posted to LinkedIn.
+        
+        Returns:
+            The message's updated status (same shape as get_message_status),
+            or None if the message does not exist
+        """
+        return self._mark_posted(self.MARK_POSTED_TO_LINKEDIN_SQL, message_id)
+    
+    def mark_posted_to_x(self, message_id: int) -> Optional[Dict]:
+        """
+        Mark a message as posted to X.
+        
+        Returns:
+            The message's updated status (same shape as get_message_status),
+            or None if the message does not exist
+        """
+        return self._mark_posted(self.MARK_POSTED_TO_X_SQL, message_id)
     
     def get_all_messages_count(self) -> int:
         """Get total count of messages."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM posted_messages")
             return cursor.fetchone()[0]
     
     def get_posted_messages_count(self) -> int:
         """Get count of fully posted messages (both LinkedIn and X)."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT COUNT(*) FROM posted_messages 
                 WHERE posted_to_linkedin = 1 AND posted_to_x = 1
             """)
             return cursor.fetchone()[0]
-    
-    def get_all_scheduled_times(self) -> List[datetime]:
-        """Get all scheduled times for existing messages."""
-        with sqlite3.connect(self.db_path) as conn:
+
+    def get_message_counts(self) -> Tuple[int, int]:
+        """Get total and fully posted message counts in a single scan."""
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT scheduled_for FROM posted_messages 
-                WHERE scheduled_for IS NOT NULL
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(posted_to_linkedin = 1 AND posted_to_x = 1), 0)
+                FROM posted_messages
             """)
-            
-            scheduled_times = []
-            for row in cursor.fetchall():
-                try:
-                    scheduled_times.append(datetime.fromisoformat(row[0]))
-                except (ValueError, TypeError):
-                    continue
-            
-            return scheduled_times
+            return cursor.fetchone()
+
+    def get_all_scheduled_times(self) -> List[datetime]:
+        """
+        Get scheduled times of existing messages from yesterday onward.
+        
+        Scheduling only ever looks at today and later, so past slots are
+        filtered out in SQL instead of being parsed. The bound is
+        yesterday in UTC so it never cuts into the current US/Eastern day.
+        """
+        if self._scheduled_times_cache is None:
+            with self.conn as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT scheduled_for FROM posted_messages 
+                    WHERE scheduled_for >= date('now', '-1 day')
+                """)
+                
+                scheduled_times = []
+                for row in cursor.fetchall():
+                    try:
+                        scheduled_times.append(datetime.fromisoformat(row[0]))
+                    except (ValueError, TypeError):
+                        continue
+                
+                self._scheduled_times_cache = scheduled_times
+        
+        # Copy so callers can't mutate the cache
+        return list(self._scheduled_times_cache)
+    
+    def _add_scheduled_times(self, scheduled_times: List[datetime]):
+        """Record newly inserted scheduled times in the cache, if it is loaded."""
+        if self._scheduled_times_cache is not None:
+            self._scheduled_times_cache.extend(scheduled_times)
     
     def get_upcoming_schedule(self, limit: int = 10) -> List[Dict]:
         """Get upcoming scheduled posts."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT 
                     pm.id,
                     pm.scheduled_for,
-                    pm.message_text,
+                    -- Only the preview is needed, so don't ship the full text
+                    substr(pm.message_text, 1, 100),
+                    length(pm.message_text) > 100,
                     pm.posted_to_linkedin,
                     pm.posted_to_x,
                     bp.title
@@ -387,22 +665,21 @@ class Database:
                 LIMIT ?
             """, (limit,))
             
-            results = []
-            for row in cursor.fetchall():
-                results.append({
+            return [
+                {
                     'id': row[0],
                     'scheduled_for': row[1],
-                    'message_preview': row[2][:100] + '...' if len(row[2]) > 100 else row[2],
-                    'posted_to_linkedin': bool(row[3]),
-                    'posted_to_x': bool(row[4]),
-                    'blog_title': row[5]
-                })
-            
-            return results
+                    'message_preview': row[2] + '...' if row[3] else row[2],
+                    'posted_to_linkedin': bool(row[4]),
+                    'posted_to_x': bool(row[5]),
+                    'blog_title': row[6]
+                }
+                for row in cursor.fetchall()
+            ]
     
     def get_message_status(self, message_id: int) -> Optional[Dict]:
         """Get posted flags and image path for a specific message id."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -423,7 +700,7 @@ class Database:
     
     def clear_image_for_message(self, message_id: int):
         """Clear image path for a message after successful posting and cleanup."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -442,21 +719,42 @@ class Database:
         Args:
             post_id: The ID of the blog post to delete
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Delete associated messages first (due to foreign key)
-            cursor.execute("DELETE FROM posted_messages WHERE blog_post_id = ?", (post_id,))
-            
-            # Delete the blog post
-            cursor.execute("DELETE FROM blog_posts WHERE id = ?", (post_id,))
-            
+        with self.conn as conn:
+            # posted_messages rows go with it via ON DELETE CASCADE
+            conn.execute("DELETE FROM blog_posts WHERE id = ?", (post_id,))
             conn.commit()
+            self._scheduled_times_cache = None
             print(f"✓ Deleted blog post {post_id} and all associated messages")
     
+    def get_post_ids_scheduled_on(self, date_str: str) -> Set[int]:
+        """Get IDs of blog posts with a message scheduled on a given date (YYYY-MM-DD)."""
+        with self.conn as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT DISTINCT blog_post_id 
+                FROM posted_messages 
+                WHERE scheduled_for >= ? AND scheduled_for < date(?, '+1 day')
+            """, (date_str, date_str))
+            return {row[0] for row in cursor.fetchall()}
+    
+    def get_messages_for_post(self, post_id: int) -> List[str]:
+        """Get the message texts of a blog post in message order."""
+        with self.conn as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT message_text FROM posted_messages 
+                WHERE blog_post_id = ?
+                ORDER BY message_index
+            """, (post_id,))
+            return [row[0] for row in cursor.fetchall()]
+    
     def get_unposted_messages(self) -> List[Dict]:
         """Get all unposted messages (not posted to any platform)."""
-        with sqlite3.connect(self.db_path) as conn:
+        return list(self.iter_unposted_messages())
+    
+    def iter_unposted_messages(self) -> Iterator[Dict]:
+        """Yield unposted messages one at a time, in scheduled order."""
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT 
@@ -476,9 +774,8 @@ class Database:
                 ORDER BY pm.scheduled_for ASC
             """)
             
-            rows = cursor.fetchall()
-            return [
-                {
+            for row in cursor:
+                yield {
                     'id': row[0],
                     'blog_post_id': row[1],
                     'message_index': row[2],
@@ -490,12 +787,10 @@ class Database:
                     'blog_title': row[8],
                     'blog_url': row[9]
                 }
-                for row in rows
-            ]
     
     def update_message_image(self, message_id: int, image_path: str):
         """Update the image URL for a specific message."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE posted_messages SET image_url = ? WHERE id = ?",
@@ -505,7 +800,7 @@ class Database:
     
     def update_message_text(self, message_id: int, new_text: str):
         """Update the message text for a specific message."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE posted_messages SET message_text = ? WHERE id = ?",
@@ -514,22 +809,31 @@ class Database:
             conn.commit()
             print(f"✅ Updated message {message_id} in database")
 
+    def update_message_texts(self, updates: List[Tuple[int, str]]):
+        """Update the text of several messages in one transaction."""
+        with self.conn as conn:
+            conn.executemany(
+                "UPDATE posted_messages SET message_text = ? WHERE id = ?",
+                ((new_text, message_id) for message_id, new_text in updates)
+            )
+        print(f"✅ Updated {len(updates)} messages in database")
+
     def update_message_schedule(self, message_id: int, scheduled_time: datetime):
         """Update the scheduled_for time for a specific message."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE posted_messages SET scheduled_for = ? WHERE id = ?",
                 (scheduled_time.isoformat(), message_id)
             )
             conn.commit()
+            # The old time isn't known here; reload on next use
+            self._scheduled_times_cache = None
             print(f"✅ Updated schedule for message {message_id} to {scheduled_time.isoformat()}")
     
     def count_available_slots_today(self) -> int:
         """Count how many free slots are available today."""
-        import pytz
-        eastern = pytz.timezone('US/Eastern')
-        today = datetime.now(eastern).replace(hour=0, minute=0, second=0, microsecond=0)
+        today = datetime.now(self.scheduler.eastern).replace(hour=0, minute=0, second=0, microsecond=0)
         
         # Check if today is a business day
         if not self.scheduler.is_business_day(today):
@@ -539,10 +843,7 @@ class Database:
         existing_schedules = self.get_all_scheduled_times()
         today_schedules = []
         for schedule in existing_schedules:
-            if schedule.tzinfo is None:
-                schedule = eastern.localize(schedule)
-            else:
-                schedule = schedule.astimezone(eastern)
+            schedule = self.scheduler.to_eastern(schedule)
             if schedule.date() == today.date():
                 today_schedules.append(schedule)
         
@@ -553,9 +854,11 @@ class Database:
     
     def get_processed_blog_posts(self, limit: int = None) -> List[Dict]:
         """Get already processed blog posts from the database."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
-            query = """
+            # Bound LIMIT keeps the statement text fixed (a negative LIMIT
+            # means no limit in SQLite)
+            cursor.execute("""
                 SELECT 
                     id,
                     post_url,
@@ -564,11 +867,8 @@ class Database:
                     published_date
                 FROM blog_posts
                 ORDER BY published_date DESC, fetched_at DESC
-            """
-            if limit:
-                query += f" LIMIT {limit}"
-            
-            cursor.execute(query)
+                LIMIT ?
+            """, (limit or -1,))
             results = []
             for row in cursor.fetchall():
                 results.append({
@@ -592,7 +892,7 @@ class Database:
         Returns:
             Message ID if successful, None otherwise
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conn as conn:
             cursor = conn.cursor()
             
             # Get the highest message_index for this post
@@ -608,29 +908,17 @@ class Database:
             blog_title_result = cursor.fetchone()
             blog_title = blog_title_result[0] if blog_title_result else ""
             
-            # Generate image based on probability
-            image_url = None
-            if self.image_generator and Config.GENERATE_IMAGES > 0:
-                import random
-                if random.random() < Config.GENERATE_IMAGES:
-                    try:
-                        image_url = self.image_generator.generate_image_for_message(
-                            blog_title=blog_title,
-                            message_text=message,
-                            message_id=None  # Will get actual ID after insert
-                        )
-                    except Exception as e:
-                        print(f"Warning: Image generation failed: {e}")
+            image_url = (
+                self._generate_image(blog_title, message)
+                if self._should_generate_image() else None
+            )
             
             # Insert the message
-            cursor.execute("""
-                INSERT INTO posted_messages 
-                (blog_post_id, message_index, message_text, image_url, scheduled_for)
-                VALUES (?, ?, ?, ?, ?)
-            """, (blog_post_id, next_index, message, image_url, scheduled_time.isoformat()))
+            cursor.execute(self.INSERT_MESSAGE_SQL, (blog_post_id, next_index, message, image_url, scheduled_time.isoformat()))
             
             message_id = cursor.lastrowid
             conn.commit()
+            self._add_scheduled_times([scheduled_time])
             
             return message_id
 
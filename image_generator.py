@@ -6,9 +6,11 @@ import os
 import base64
 import tempfile
 import hashlib
-from typing import Optional, Dict
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, List
 from config import Config
-from anthropic import Anthropic
+from anthropic_client import get_anthropic_client
 
 
 class ImageGenerator:
@@ -16,6 +18,18 @@ class ImageGenerator:
     
     XAI_API_BASE = "https://api.x.ai/v1"
     IMAGE_MODEL = "grok-2-image"
+    PROMPT_MODEL = "claude-sonnet-4-20250514"
+    
+    # Upper bound on concurrent image generation requests
+    MAX_WORKERS = 8
+    
+    PROMPT_GUIDELINES = """Create a concise, visual image generation prompt (max 100 words) that:
+1. Captures the core concept from the message
+2. Is professional and business-appropriate
+3. Works well for social media (LinkedIn/Twitter)
+4. Avoids text/words in the image
+5. Uses metaphors or visual concepts
+6. Specifies professional, modern style"""
     
     def __init__(self, api_key: str = None):
         """
@@ -25,7 +39,29 @@ class ImageGenerator:
             api_key: xAI API key
         """
         self.api_key = api_key or Config.XAI_API_KEY
-        self.anthropic_client = Anthropic(api_key=Config.ANTHROPIC_API_KEY)
+        self.anthropic_client = get_anthropic_client(Config.ANTHROPIC_API_KEY)
+        # Pooled keep-alive connections, shared by concurrent generation threads
+        self.session = requests.Session()
+    
+    def _prompt_cache_path(self, blog_title: str, message_text: str) -> str:
+        """Path of the on-disk cache entry for a message's image prompt."""
+        cache_key = hashlib.sha256(f"{blog_title}|{message_text}".encode('utf-8')).hexdigest()
+        return os.path.join(Config.IMAGE_OUTPUT_DIR, ".cache", f"{cache_key}.txt")
+    
+    def _read_cached_prompt(self, blog_title: str, message_text: str) -> Optional[str]:
+        """Get a previously created image prompt, if cached."""
+        cache_path = self._prompt_cache_path(blog_title, message_text)
+        if not os.path.isfile(cache_path):
+            return None
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def _write_cached_prompt(self, blog_title: str, message_text: str, image_prompt: str):
+        """Store an image prompt in the on-disk cache."""
+        cache_path = self._prompt_cache_path(blog_title, message_text)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            f.write(image_prompt)
     
     def create_image_prompt(self, blog_title: str, message_text: str) -> str:
         """
@@ -38,30 +74,30 @@ class ImageGenerator:
         Returns:
             Optimized prompt for image generation
         """
+        # Prompts are cached on disk by content, so repeat messages skip Claude
+        cached = self._read_cached_prompt(blog_title, message_text)
+        if cached is not None:
+            return cached
+        
         try:
             prompt = f"""You are an expert at creating prompts for AI image generation.
 
 Blog Post Title: {blog_title}
 Social Media Message: {message_text}
 
-Create a concise, visual image generation prompt (max 100 words) that:
-1. Captures the core concept from the message
-2. Is professional and business-appropriate
-3. Works well for social media (LinkedIn/Twitter)
-4. Avoids text/words in the image
-5. Uses metaphors or visual concepts
-6. Specifies professional, modern style
+{self.PROMPT_GUIDELINES}
 
 Return ONLY the image prompt, nothing else."""
 
             response = self.anthropic_client.messages.create(
-                model="claude-sonnet-4-20250514",
+                model=self.PROMPT_MODEL,
                 max_tokens=200,
                 temperature=0.7,
                 messages=[{"role": "user", "content": prompt}]
             )
             
             image_prompt = response.content[0].text.strip()
+            self._write_cached_prompt(blog_title, message_text, image_prompt)
             return image_prompt
         
         except Exception as e:
@@ -69,6 +105,68 @@ Return ONLY the image prompt, nothing else."""
             # Fallback to simple prompt
             return f"Professional illustration representing: {blog_title}"
     
+    def create_image_prompts(self, blog_title: str, messages: List[str]) -> List[str]:
+        """
+        Create image prompts for several messages of one blog post.
+        
+        Uncached messages are sent to Claude in a single request instead of
+        one request per message. If the batched reply can't be parsed, each
+        message falls back to create_image_prompt.
+        
+        Args:
+            blog_title: Title of the blog post
+            messages: The social media message texts
+            
+        Returns:
+            One image prompt per message, in the same order
+        """
+        prompts = [self._read_cached_prompt(blog_title, message) for message in messages]
+        missing = [idx for idx, prompt in enumerate(prompts) if prompt is None]
+        if not missing:
+            return prompts
+        if len(missing) == 1:
+            idx = missing[0]
+            prompts[idx] = self.create_image_prompt(blog_title, messages[idx])
+            return prompts
+        
+        numbered = "\n".join(
+            f"{number}. {messages[idx]}" for number, idx in enumerate(missing, start=1)
+        )
+        request = f"""You are an expert at creating prompts for AI image generation.
+
+Blog Post Title: {blog_title}
+Social Media Messages:
+{numbered}
+
+For EACH message:
+{self.PROMPT_GUIDELINES}
+
+Return ONLY a JSON array of {len(missing)} strings, one image prompt per message, in the same order."""
+        
+        try:
+            response = self.anthropic_client.messages.create(
+                model=self.PROMPT_MODEL,
+                max_tokens=200 * len(missing),
+                temperature=0.7,
+                messages=[{"role": "user", "content": request}]
+            )
+            text = response.content[0].text
+            # Tolerate prose or code fences around the array
+            batch = json.loads(text[text.index('['):text.rindex(']') + 1])
+            if (not isinstance(batch, list) or len(batch) != len(missing)
+                    or not all(isinstance(p, str) and p.strip() for p in batch)):
+                raise ValueError(f"expected {len(missing)} prompts, got {text[:100]!r}")
+        except Exception as e:
+            print(f"Error creating image prompts in batch, falling back to one per message: {e}")
+            for idx in missing:
+                prompts[idx] = self.create_image_prompt(blog_title, messages[idx])
+            return prompts
+        
+        for idx, image_prompt in zip(missing, batch):
+            prompts[idx] = image_prompt.strip()
+            self._write_cached_prompt(blog_title, messages[idx], prompts[idx])
+        return prompts
+    
     def generate_image(self, prompt: str) -> Optional[str]:
         """
         Generate an image using xAI Grok API.
@@ -83,6 +181,14 @@ Return ONLY the image prompt, nothing else."""
             print("Warning: XAI_API_KEY not configured, skipping image generation")
             return None
         
+        # Output filenames are derived from the prompt, so an existing file
+        # is this prompt's image and the paid API call can be skipped
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+        image_path = os.path.join(Config.IMAGE_OUTPUT_DIR, f"img_{prompt_hash}.jpg")
+        if os.path.isfile(image_path):
+            print(f"✓ Reusing existing image: {image_path}")
+            return image_path
+        
         try:
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -96,7 +202,7 @@ Return ONLY the image prompt, nothing else."""
                 "response_format": "b64_json"  # Get base64 encoded image
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.XAI_API_BASE}/images/generations",
                 headers=headers,
                 json=data,
@@ -117,8 +223,6 @@ Return ONLY the image prompt, nothing else."""
                 
                 # Save to configured output directory with deterministic filename
                 os.makedirs(Config.IMAGE_OUTPUT_DIR, exist_ok=True)
-                prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
-                image_path = os.path.join(Config.IMAGE_OUTPUT_DIR, f"img_{prompt_hash}.jpg")
                 with open(image_path, 'wb') as f:
                     f.write(image_bytes)
                 print(f"✓ Generated image saved to: {image_path}")
@@ -155,7 +259,7 @@ Return ONLY the image prompt, nothing else."""
             True if successful, False otherwise
         """
         try:
-            response = requests.get(image_url, timeout=30)
+            response = self.session.get(image_url, timeout=30)
             response.raise_for_status()
             
             os.makedirs(os.path.dirname(save_path), exist_ok=True)
@@ -201,4 +305,42 @@ Return ONLY the image prompt, nothing else."""
         
         # Image is already saved to the output directory; return path
         return image_path
-
+    
+    def generate_images_for_messages(
+        self,
+        blog_title: str,
+        messages: List[str]
+    ) -> List[Optional[str]]:
+        """
+        Create prompts and generate images for several messages of one blog post.
+        
+        Prompts come from one batched Claude call; the image requests are
+        independent round trips, so they run concurrently. A failure only
+        leaves that message without an image.
+        
+        Args:
+            blog_title: Blog post title
+            messages: Social media messages
+            
+        Returns:
+            Image path (or None) for each message, in the same order
+        """
+        if not messages:
+            return []
+        
+        print(f"\n🎨 Generating {len(messages)} image(s)...")
+        image_prompts = self.create_image_prompts(blog_title, messages)
+        
+        image_paths = [None] * len(messages)
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(messages))) as executor:
+            futures = {
+                executor.submit(self.generate_image, image_prompt): idx
+                for idx, image_prompt in enumerate(image_prompts)
+            }
+            for future in as_completed(futures):
+                try:
+                    image_paths[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"Warning: Image generation failed: {e}")
+        
+        return image_paths
@@ -67,21 +67,19 @@ def get_user_info(access_token):
         "Authorization": f"Bearer {access_token}"
     }
     
-    # Get basic profile
-    response = requests.get(
-        "https://api.linkedin.com/v2/userinfo",
-        headers=headers
-    )
-    response.raise_for_status()
-    user_info = response.json()
-    
-    # Get detailed profile to extract person URN
-    response = requests.get(
-        "https://api.linkedin.com/v2/me",
-        headers=headers
-    )
-    response.raise_for_status()
-    me_info = response.json()
+    # Both calls go to api.linkedin.com, so share one keep-alive connection
+    with requests.Session() as session:
+        session.headers.update(headers)
+        
+        # Get basic profile
+        response = session.get("https://api.linkedin.com/v2/userinfo")
+        response.raise_for_status()
+        user_info = response.json()
+        
+        # Get detailed profile to extract person URN
+        response = session.get("https://api.linkedin.com/v2/me")
+        response.raise_for_status()
+        me_info = response.json()
     
     return {
         "name": user_info.get("name"),
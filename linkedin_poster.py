@@ -2,15 +2,38 @@
 LinkedIn posting module.
 """
 import requests
+import hashlib
 import os
+import random
 import tempfile
+import time
 from typing import Dict, Optional
 from config import Config
 
 
+# Access tokens that recently passed verify_credentials, keyed by token hash,
+# mapped to the time.monotonic() at which the result expires
+_verified_tokens: Dict[str, float] = {}
+
+
 class LinkedInPoster:
     """Post content to LinkedIn."""
     
+    # Transient failures worth retrying with backoff
+    MAX_RETRIES = 5
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+    # Longest Retry-After wait honored before giving up on the header
+    MAX_RETRY_AFTER = 120
+    
+    # (connect, read) timeouts: fail fast on a stalled handshake, but allow
+    # slow responses and large binary uploads once connected
+    API_TIMEOUT = (5, 30)
+    UPLOAD_TIMEOUT = (5, 120)
+    VERIFY_TIMEOUT = (5, 10)
+    
+    # How long a successful credential check is trusted
+    VERIFY_CACHE_TTL = 300
+    
     def __init__(self, access_token: str = None, user_id: str = None, org_id: str = None, post_as_org: bool = None):
         """
         Initialize LinkedIn poster.
@@ -26,6 +49,22 @@ class LinkedInPoster:
         self.org_id = org_id or Config.LINKEDIN_ORG_ID
         self.post_as_org = post_as_org if post_as_org is not None else Config.LINKEDIN_POST_AS_ORG
         self.api_base = "https://api.linkedin.com/v2"
+        # Post author and image owner: the organization or the person
+        if self.post_as_org:
+            self.author_urn = f"urn:li:organization:{self.org_id}" if self.org_id else None
+        else:
+            self.author_urn = f"urn:li:person:{self.user_id}" if self.user_id else None
+        # Keep-alive connection pool shared by the register/upload/post calls
+        self.session = requests.Session()
+        # Request headers, built once; requests copies them, so they're never mutated
+        self._auth_headers = {
+            "Authorization": f"Bearer {self.access_token}",
+        }
+        self._json_headers = {
+            **self._auth_headers,
+            "Content-Type": "application/json",
+            "X-Restli-Protocol-Version": "2.0.0"
+        }
     
     def post(self, text: str, image_url: Optional[str] = None) -> Dict:
         """
@@ -41,27 +80,18 @@ class LinkedInPoster:
         if not self.access_token:
             raise ValueError("LinkedIn access token not configured")
         
-        # Determine author URN (person or organization)
         if self.post_as_org:
-            if not self.org_id:
+            if not self.author_urn:
                 raise ValueError("LinkedIn organization ID not configured")
-            author_urn = f"urn:li:organization:{self.org_id}"
             print(f"Posting as organization: {self.org_id}")
         else:
-            if not self.user_id:
+            if not self.author_urn:
                 raise ValueError("LinkedIn user ID not configured")
-            author_urn = f"urn:li:person:{self.user_id}"
             print(f"Posting as person: {self.user_id}")
         
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-            "X-Restli-Protocol-Version": "2.0.0"
-        }
-        
         # Prepare the post data
         post_data = {
-            "author": author_urn,
+            "author": self.author_urn,
             "lifecycleState": "PUBLISHED",
             "specificContent": {
                 "com.linkedin.ugc.ShareContent": {
@@ -93,11 +123,13 @@ class LinkedInPoster:
                 post_data["specificContent"]["com.linkedin.ugc.ShareContent"]["shareMediaCategory"] = "NONE"
         
         try:
-            response = requests.post(
+            response = self._request(
+                "POST",
                 f"{self.api_base}/ugcPosts",
-                headers=headers,
+                idempotent=False,
+                headers=self._json_headers,
                 json=post_data,
-                timeout=30
+                timeout=self.API_TIMEOUT
             )
             
             response.raise_for_status()
@@ -118,6 +150,44 @@ class LinkedInPoster:
                 "status_code": getattr(e.response, 'status_code', None) if hasattr(e, 'response') else None
             }
     
+    def _request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying transient failures with jittered exponential backoff.
+        
+        Non-idempotent calls (creating a post) are only retried when LinkedIn
+        cannot have acted on them: rate limiting (429) or a failed connect.
+        Everything else also retries on 5xx, dropped connections and timeouts. A 429's
+        Retry-After (in seconds) is honored when present.
+        
+        Returns:
+            The last response; callers still check its status
+        """
+        retry_statuses = self.RETRY_STATUS_CODES if idempotent else {429}
+        retry_errors = ((requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+                        if idempotent else requests.exceptions.ConnectTimeout)
+        
+        for attempt in range(self.MAX_RETRIES + 1):
+            wait = random.uniform(2, 4) * 2 ** attempt
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code not in retry_statuses or attempt == self.MAX_RETRIES:
+                    return response
+                reason = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("Retry-After", "")
+                if response.status_code == 429 and retry_after.isdigit():
+                    wait = min(int(retry_after), self.MAX_RETRY_AFTER)
+            except retry_errors as e:
+                if attempt == self.MAX_RETRIES:
+                    raise
+                reason = type(e).__name__
+            
+            print(f"LinkedIn {method} failed ({reason}), retrying in {wait:.1f}s...")
+            time.sleep(wait)
+            # Rewind streamed (file) request bodies before resending
+            data = kwargs.get('data')
+            if hasattr(data, 'seekable') and data.seekable():
+                data.seek(0)
+    
     def verify_credentials(self) -> bool:
         """
         Verify that LinkedIn credentials are valid.
@@ -128,20 +198,25 @@ class LinkedInPoster:
         if not self.access_token:
             return False
         
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-        }
+        # Only successes are cached, so a revoked token is noticed on the next check
+        token_key = hashlib.sha256(self.access_token.encode('utf-8')).hexdigest()[:32]
+        if _verified_tokens.get(token_key, 0) > time.monotonic():
+            return True
         
         try:
-            response = requests.get(
+            response = self._request(
+                "GET",
                 f"{self.api_base}/me",
-                headers=headers,
-                timeout=10
+                headers=self._auth_headers,
+                timeout=self.VERIFY_TIMEOUT
             )
-            return response.status_code == 200
-        
         except:
             return False
+        
+        if response.status_code != 200:
+            return False
+        _verified_tokens[token_key] = time.monotonic() + self.VERIFY_CACHE_TTL
+        return True
     
     def _upload_image(self, image_path: str) -> Optional[str]:
         """
@@ -156,16 +231,10 @@ class LinkedInPoster:
         try:
             # Step 1: Register upload
             register_upload_url = f"{self.api_base}/assets?action=registerUpload"
-            # Determine owner URN (person or organization)
-            if self.post_as_org:
-                owner_urn = f"urn:li:organization:{self.org_id}"
-            else:
-                owner_urn = f"urn:li:person:{self.user_id}"
-            
             register_data = {
                 "registerUploadRequest": {
                     "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
-                    "owner": owner_urn,
+                    "owner": self.author_urn,
                     "serviceRelationships": [{
                         "relationshipType": "OWNER",
                         "identifier": "urn:li:userGeneratedContent"
@@ -173,13 +242,7 @@ class LinkedInPoster:
                 }
             }
             
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json",
-                "X-Restli-Protocol-Version": "2.0.0"
-            }
-            
-            response = requests.post(register_upload_url, headers=headers, json=register_data, timeout=30)
+            response = self._request("POST", register_upload_url, headers=self._json_headers, json=register_data, timeout=self.API_TIMEOUT)
             response.raise_for_status()
             
             register_result = response.json()
@@ -187,28 +250,23 @@ class LinkedInPoster:
                 'com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
             asset_urn = register_result['value']['asset']
             
-            # Step 2: Read image data (from file path or URL)
-            if os.path.isfile(image_path):
-                # Local file
-                with open(image_path, 'rb') as f:
-                    image_data = f.read()
-            elif image_path.startswith(('http://', 'https://')):
-                # It's a URL
-                img_response = requests.get(image_path, timeout=30)
+            # Step 2 + 3: Upload image binary (from file path or URL)
+            # URLs are recognized by scheme first, so they never hit the filesystem
+            if image_path.startswith(('http://', 'https://')):
+                # It's a URL; buffered so the upload can be retried
+                img_response = self._request("GET", image_path, timeout=self.API_TIMEOUT)
                 img_response.raise_for_status()
-                image_data = img_response.content
+                upload_response = self._request("PUT", upload_url, headers=self._auth_headers, data=img_response.content, timeout=self.UPLOAD_TIMEOUT)
+            elif os.path.isfile(image_path):
+                # Local file: stream it from disk instead of reading it into memory
+                with open(image_path, 'rb') as f:
+                    upload_response = self._request("PUT", upload_url, headers=self._auth_headers, data=f, timeout=self.UPLOAD_TIMEOUT)
             else:
                 # File doesn't exist - this is common in CI/CD environments
                 print(f"Warning: Image file not found: '{image_path}'")
                 print("   This is normal when images are missing from artifacts.")
                 return None
             
-            # Step 3: Upload image binary
-            upload_headers = {
-                "Authorization": f"Bearer {self.access_token}",
-            }
-            
-            upload_response = requests.put(upload_url, headers=upload_headers, data=image_data, timeout=60)
             upload_response.raise_for_status()
             
             print(f"✓ Uploaded image to LinkedIn: {asset_urn}")
@@ -3,24 +3,60 @@
 Main orchestration script for automated blog post distribution.
 """
 import sys
+import io
 import argparse
-from typing import List, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from typing import Callable, List, Dict, Tuple
 from datetime import datetime
 
 from config import Config
-from database import Database
-from rss_parser import RSSParser
-from content_extractor import ContentExtractor
-from linkedin_poster import LinkedInPoster
-from x_poster import XPoster
 import os
 
 
+class _ThreadBufferedStdout:
+    """
+    Stand-in for sys.stdout that sends a thread's output to its own buffer
+    while one is set (see buffered), and everything else to the real stream.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+    
+    def buffered(self, func: Callable, *args) -> Tuple[object, str]:
+        """Call func, returning its result and everything it printed."""
+        self._local.buffer = io.StringIO()
+        try:
+            return func(*args), self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
+    
+    def write(self, text: str) -> int:
+        return (getattr(self._local, 'buffer', None) or self.stream).write(text)
+    
+    def flush(self):
+        if getattr(self._local, 'buffer', None) is None:
+            self.stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
 class BlogPostAutomation:
     """Main automation orchestrator."""
     
     def __init__(self):
         """Initialize the automation system."""
+        # Imported here so --help and argument errors don't pay for loading
+        # anthropic, feedparser and the API clients
+        from database import Database
+        from rss_parser import RSSParser
+        from content_extractor import ContentExtractor
+        from linkedin_poster import LinkedInPoster
+        from x_poster import XPoster
+        
         print("Initializing automation system...", flush=True)
         
         print("Validating configuration...", flush=True)
@@ -33,7 +69,7 @@ class BlogPostAutomation:
         self.rss_parser = RSSParser()
         
         print("Initializing content extractor (Anthropic)...", flush=True)
-        self.content_extractor = ContentExtractor()
+        self.content_extractor = ContentExtractor(db=self.db)
         
         print("Initializing social media posters...", flush=True)
         self.linkedin_poster = LinkedInPoster()
@@ -60,13 +96,19 @@ class BlogPostAutomation:
         print("Fetching latest blog posts...", flush=True)
         sys.stdout.flush()
         
-        posts = self.rss_parser.fetch_latest_posts(limit=limit)
+        # Posts already in the database are dropped before their HTML is cleaned
+        posts = self.rss_parser.fetch_latest_posts(limit=limit, skip_urls=self.db.get_processed_urls())
+        
+        # Entries the parser left out because they were already processed
+        skipped_count = self.rss_parser.skipped_count
         
         if not posts:
-            print("No posts found in RSS feed.")
+            if skipped_count:
+                print(f"No new posts in RSS feed ({skipped_count} already processed).")
+            else:
+                print("No posts found in RSS feed.")
         
         processed_count = 0
-        skipped_count = 0
         
         # Process posts from RSS feed
         if posts:
@@ -165,20 +207,9 @@ class BlogPostAutomation:
                     
                     # Get list of blog post IDs that already have messages scheduled for today
                     # to avoid creating multiple messages from the same post on the same day
-                    posts_with_today_messages = set()
-                    import sqlite3
-                    today_str = today.date().isoformat()
-                    with sqlite3.connect(self.db.db_path) as conn:
-                        cursor = conn.cursor()
-                        # Find all blog_post_ids that have messages scheduled for today
-                        cursor.execute("""
-                            SELECT DISTINCT blog_post_id 
-                            FROM posted_messages 
-                            WHERE scheduled_for IS NOT NULL
-                              AND date(substr(scheduled_for, 1, 10)) = ?
-                        """, (today_str,))
-                        for row in cursor.fetchall():
-                            posts_with_today_messages.add(row[0])
+                    posts_with_today_messages = self.db.get_post_ids_scheduled_on(
+                        today.date().isoformat()
+                    )
                     
                     # Create messages for available slots
                     messages_created = 0
@@ -199,7 +230,8 @@ class BlogPostAutomation:
                             messages = self.content_extractor.extract_daily_messages(
                                 title=post['title'],
                                 content=post['content'],
-                                num_messages=1  # Just one message for today
+                                num_messages=1,  # Just one message for today
+                                use_cache=False  # Want a fresh message each time
                             )
                             
                             if not messages:
@@ -295,20 +327,9 @@ class BlogPostAutomation:
                     
                     # Get list of blog post IDs that already have messages scheduled for today
                     # to avoid creating multiple messages from the same post on the same day
-                    posts_with_today_messages = set()
-                    import sqlite3
-                    today_str = today.date().isoformat()
-                    with sqlite3.connect(self.db.db_path) as conn:
-                        cursor = conn.cursor()
-                        # Find all blog_post_ids that have messages scheduled for today
-                        cursor.execute("""
-                            SELECT DISTINCT blog_post_id 
-                            FROM posted_messages 
-                            WHERE scheduled_for IS NOT NULL
-                              AND date(substr(scheduled_for, 1, 10)) = ?
-                        """, (today_str,))
-                        for row in cursor.fetchall():
-                            posts_with_today_messages.add(row[0])
+                    posts_with_today_messages = self.db.get_post_ids_scheduled_on(
+                        today.date().isoformat()
+                    )
                     
                     # Create messages for available slots
                     messages_created = 0
@@ -329,7 +350,8 @@ class BlogPostAutomation:
                             messages = self.content_extractor.extract_daily_messages(
                                 title=post['title'],
                                 content=post['content'],
-                                num_messages=1  # Just one message for today
+                                num_messages=1,  # Just one message for today
+                                use_cache=False  # Want a fresh message each time
                             )
                             
                             if not messages:
@@ -388,7 +410,14 @@ class BlogPostAutomation:
         print(f"Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"Database path: {Config.DATABASE_PATH}")
         print(f"Database exists: {os.path.exists(Config.DATABASE_PATH)}")
-        
+
+        # Nothing could be posted, so don't bother looking up a message
+        linkedin_configured = Config.LINKEDIN_ENABLED and Config.LINKEDIN_ACCESS_TOKEN
+        if not linkedin_configured and not Config.X_API_KEY:
+            print("\n⊘ No posting platforms configured (LinkedIn disabled or missing token, X_API_KEY not set)")
+            print("="*60 + "\n")
+            return
+
         # Get next message to post
         print("\n🔍 Calling get_next_message_to_post()...")
         message_data = self.db.get_next_message_to_post()
@@ -416,31 +445,17 @@ class BlogPostAutomation:
             print(f"Image: {message_data['image_url'][:60]}...")
         print(f"\nBase Message:\n{message_data['message_text']}\n")
         
+        # Latest posted flags / image path, as returned by the mark_* calls
+        status = None
+        test_mode = os.getenv('TEST_MODE', '').lower() == 'true'
+        
+        # Platforms to post to now, with the DB call that records success
+        platforms = {}
+        
         # Post to LinkedIn
-        if Config.LINKEDIN_ENABLED and not message_data['posted_to_linkedin'] and Config.LINKEDIN_ACCESS_TOKEN and not os.getenv('TEST_MODE', '').lower() == 'true':
-            print("\n--- Posting to LinkedIn ---")
-            try:
-                # Enhance message for LinkedIn
-                enhanced_message = self.content_extractor.enhance_for_platform(
-                    message=message_data['message_text'],
-                    platform='linkedin',
-                    blog_url=message_data['blog_url'],
-                    hashtags=['blog', 'insights']
-                )
-                
-                print(f"LinkedIn Message:\n{enhanced_message}\n")
-                
-                result = self.linkedin_poster.post(enhanced_message, image_url=message_data.get('image_url'))
-                
-                if result['success']:
-                    print("✓ Successfully posted to LinkedIn")
-                    self.db.mark_posted_to_linkedin(message_data['id'])
-                else:
-                    print(f"✗ Failed to post to LinkedIn: {result.get('error', 'Unknown error')}")
-            
-            except Exception as e:
-                print(f"✗ Error posting to LinkedIn: {e}")
-        elif os.getenv('TEST_MODE', '').lower() == 'true':
+        if Config.LINKEDIN_ENABLED and not message_data['posted_to_linkedin'] and Config.LINKEDIN_ACCESS_TOKEN and not test_mode:
+            platforms[self._post_to_linkedin] = self.db.mark_posted_to_linkedin
+        elif test_mode:
             print("⊘ LinkedIn posting disabled in TEST_MODE")
         elif not Config.LINKEDIN_ENABLED:
             print("⊘ LinkedIn posting disabled (set LINKEDIN_ENABLED=true to enable)")
@@ -451,30 +466,9 @@ class BlogPostAutomation:
                 print("⊘ LinkedIn not configured (skipping)")
         
         # Post to X (Twitter)
-        if not message_data['posted_to_x'] and Config.X_API_KEY and not os.getenv('TEST_MODE', '').lower() == 'true':
-            print("\n--- Posting to X (Twitter) ---")
-            try:
-                # Enhance message for X
-                enhanced_message = self.content_extractor.enhance_for_platform(
-                    message=message_data['message_text'],
-                    platform='x',
-                    blog_url=message_data['blog_url'],
-                    hashtags=['blog', 'tech']
-                )
-                
-                print(f"X Message:\n{enhanced_message}\n")
-                
-                result = self.x_poster.post(enhanced_message, image_url=message_data.get('image_url'))
-                
-                if result['success']:
-                    print(f"✓ Successfully posted to X (Tweet ID: {result.get('tweet_id')})")
-                    self.db.mark_posted_to_x(message_data['id'])
-                else:
-                    print(f"✗ Failed to post to X: {result.get('error', 'Unknown error')}")
-            
-            except Exception as e:
-                print(f"✗ Error posting to X: {e}")
-        elif os.getenv('TEST_MODE', '').lower() == 'true':
+        if not message_data['posted_to_x'] and Config.X_API_KEY and not test_mode:
+            platforms[self._post_to_x] = self.db.mark_posted_to_x
+        elif test_mode:
             print("⊘ X (Twitter) posting disabled in TEST_MODE")
         else:
             if message_data['posted_to_x']:
@@ -482,9 +476,28 @@ class BlogPostAutomation:
             else:
                 print("⊘ X (Twitter) not configured (skipping)")
         
+        # The platform calls are independent network round trips, so run them
+        # concurrently. Each success is recorded as soon as it completes, on
+        # this thread, since the database connection isn't shared with workers.
+        # Each platform's output (including the posters' own) is buffered and
+        # printed here in one piece, so the two don't interleave in the log.
+        if platforms:
+            output = _ThreadBufferedStdout(sys.stdout)
+            with redirect_stdout(output), ThreadPoolExecutor(max_workers=len(platforms)) as executor:
+                futures = {
+                    executor.submit(output.buffered, post_to_platform, message_data): mark_posted
+                    for post_to_platform, mark_posted in platforms.items()
+                }
+                for future in as_completed(futures):
+                    posted, report = future.result()
+                    print(report, end='', flush=True)
+                    if posted:
+                        status = futures[future](message_data['id'])
+        
         # Clean up image file after any successful posting
         try:
-            status = self.db.get_message_status(message_data['id'])
+            if status is None:
+                status = self.db.get_message_status(message_data['id'])
             if status and (status['posted_to_linkedin'] or status['posted_to_x']) and status.get('image_url'):
                 image_path = status['image_url']
                 if os.path.isfile(image_path):
@@ -502,6 +515,56 @@ class BlogPostAutomation:
         print(f"Daily posting completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("="*60 + "\n")
     
+    def _post_to_linkedin(self, message_data: Dict) -> bool:
+        """Enhance and post a message to LinkedIn. Returns True on success."""
+        print("\n--- Posting to LinkedIn ---")
+        try:
+            # Enhance message for LinkedIn
+            enhanced_message = self.content_extractor.enhance_for_platform(
+                message=message_data['message_text'],
+                platform='linkedin',
+                blog_url=message_data['blog_url'],
+                hashtags=['blog', 'insights']
+            )
+            
+            print(f"LinkedIn Message:\n{enhanced_message}\n")
+            
+            result = self.linkedin_poster.post(enhanced_message, image_url=message_data.get('image_url'))
+            
+            if result['success']:
+                print("✓ Successfully posted to LinkedIn")
+                return True
+            print(f"✗ Failed to post to LinkedIn: {result.get('error', 'Unknown error')}")
+        
+        except Exception as e:
+            print(f"✗ Error posting to LinkedIn: {e}")
+        return False
+    
+    def _post_to_x(self, message_data: Dict) -> bool:
+        """Enhance and post a message to X (Twitter). Returns True on success."""
+        print("\n--- Posting to X (Twitter) ---")
+        try:
+            # Enhance message for X
+            enhanced_message = self.content_extractor.enhance_for_platform(
+                message=message_data['message_text'],
+                platform='x',
+                blog_url=message_data['blog_url'],
+                hashtags=['blog', 'tech']
+            )
+            
+            print(f"X Message:\n{enhanced_message}\n")
+            
+            result = self.x_poster.post(enhanced_message, image_url=message_data.get('image_url'))
+            
+            if result['success']:
+                print(f"✓ Successfully posted to X (Tweet ID: {result.get('tweet_id')})")
+                return True
+            print(f"✗ Failed to post to X: {result.get('error', 'Unknown error')}")
+        
+        except Exception as e:
+            print(f"✗ Error posting to X: {e}")
+        return False
+    
     def regenerate_missing_images(self):
         """Regenerate images for unposted messages that have invalid image paths."""
         print(f"\n{'='*60}")
@@ -578,8 +641,7 @@ class BlogPostAutomation:
         print("AUTOMATION STATUS")
         print("="*60 + "\n")
         
-        total_messages = self.db.get_all_messages_count()
-        posted_messages = self.db.get_posted_messages_count()
+        total_messages, posted_messages = self.db.get_message_counts()
         
         print(f"Total messages in database: {total_messages}")
         print(f"Fully posted messages: {posted_messages}")
@@ -609,11 +671,9 @@ class BlogPostAutomation:
         upcoming = self.db.get_upcoming_schedule(limit=5)
         if upcoming:
             print("\n--- Upcoming Schedule (Next 5) ---")
+            eastern = self.db.scheduler.eastern
             for idx, post in enumerate(upcoming, 1):
-                from datetime import datetime
-                import pytz
                 scheduled = datetime.fromisoformat(post['scheduled_for'])
-                eastern = pytz.timezone('US/Eastern')
                 scheduled_et = scheduled.astimezone(eastern)
                 date_str = scheduled_et.strftime('%a %m/%d at %I:%M %p ET')
                 print(f"{idx}. {date_str}")
@@ -645,7 +705,8 @@ class BlogPostAutomation:
             test_messages = self.content_extractor.extract_daily_messages(
                 title="Test Post",
                 content="This is a test blog post about technology and innovation.",
-                num_messages=2
+                num_messages=2,
+                use_cache=False
             )
             if test_messages:
                 print(f"✓ Anthropic API working (extracted {len(test_messages)} message(s))")
@@ -5,24 +5,17 @@ Only processes messages that haven't been posted to any platform yet.
 """
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from database import Database
 from content_extractor import ContentExtractor
 from config import Config
 
-def find_short_unposted_messages(db, max_chars=280):
-    """
-    Find messages that are shorter than max_chars and haven't been posted yet.
-    
-    Args:
-        db: Database instance
-        max_chars: Maximum character limit to consider as "short"
-    
-    Returns:
-        List of message records that need regeneration
-    """
-    import sqlite3
-    
-    query = """
+# Concurrent Anthropic requests; kept low to stay within rate limits
+MAX_WORKERS = 4
+
+# Runs on the shared Database connection, whose statement cache keeps it
+# prepared; the unposted partial index serves the filter and ordering
+SHORT_UNPOSTED_MESSAGES_SQL = """
     SELECT 
         pm.id,
         pm.blog_post_id,
@@ -30,8 +23,11 @@ def find_short_unposted_messages(db, max_chars=280):
         pm.message_text,
         pm.scheduled_for,
         bp.title,
-        bp.content,
-        bp.post_url
+        -- Only the excerpt used in the regeneration prompt
+        SUBSTR(bp.content, 1, 2000) AS content,
+        bp.post_url,
+        -- Length of the original text, so Python doesn't rescan it
+        LENGTH(pm.message_text) AS char_len
     FROM posted_messages pm
     JOIN blog_posts bp ON pm.blog_post_id = bp.id
     WHERE 
@@ -41,33 +37,15 @@ def find_short_unposted_messages(db, max_chars=280):
         AND pm.scheduled_for IS NOT NULL
     ORDER BY pm.scheduled_for ASC
     """
-    
-    with sqlite3.connect(db.db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, (max_chars,))
-        return cursor.fetchall()
 
-def regenerate_message(extractor, original_text, blog_title, blog_content):
-    """
-    Regenerate a message using Anthropic to make it longer and more detailed.
-    
-    Args:
-        extractor: ContentExtractor instance
-        original_text: Original short message
-        blog_title: Blog post title
-        blog_content: Blog post content
-    
-    Returns:
-        New longer message text
-    """
-    prompt = f"""You are a social media content strategist. I have a short social media message that needs to be expanded into a more detailed, engaging post.
+REGENERATE_PROMPT_TEMPLATE = """You are a social media content strategist. I have a short social media message that needs to be expanded into a more detailed, engaging post.
 
 Original Short Message: {original_text}
 
 Blog Title: {blog_title}
 
 Blog Content (excerpt):
-{blog_content[:2000]}
+{blog_content}
 
 Please expand the original message into a more comprehensive, engaging social media post that:
 1. Is between 100-200 words for optimal engagement
@@ -80,6 +58,38 @@ Please expand the original message into a more comprehensive, engaging social me
 
 Return only the expanded message text, no additional formatting or explanations."""
 
+def find_short_unposted_messages(db, max_chars=280):
+    """
+    Find messages that are shorter than max_chars and haven't been posted yet.
+    
+    Args:
+        db: Database instance
+        max_chars: Maximum character limit to consider as "short"
+    
+    Returns:
+        List of message records that need regeneration
+    """
+    return db.conn.execute(SHORT_UNPOSTED_MESSAGES_SQL, (max_chars,)).fetchall()
+
+def regenerate_message(extractor, original_text, blog_title, blog_content):
+    """
+    Regenerate a message using Anthropic to make it longer and more detailed.
+    
+    Args:
+        extractor: ContentExtractor instance
+        original_text: Original short message
+        blog_title: Blog post title
+        blog_content: Blog post content excerpt (already truncated by the query)
+    
+    Returns:
+        New longer message text
+    """
+    prompt = REGENERATE_PROMPT_TEMPLATE.format(
+        original_text=original_text,
+        blog_title=blog_title,
+        blog_content=blog_content,
+    )
+
     try:
         message = extractor.client.messages.create(
             model="claude-sonnet-4-20250514",
@@ -96,6 +106,66 @@ Return only the expanded message text, no additional formatting or explanations.
         print(f"Error regenerating message: {e}")
         return None
 
+def report_regenerated_message(db, extractor, message_record, new_text, i, total):
+    """
+    Print the outcome for one message and store its regenerated text.
+    
+    Args:
+        db: Database instance
+        extractor: ContentExtractor instance (for word counts)
+        message_record: Row from find_short_unposted_messages
+        new_text: Regenerated text, or None if regeneration failed
+        i: Position of this result in the output
+        total: Number of messages being processed
+    """
+    (msg_id, blog_post_id, msg_index, original_text, scheduled_for,
+     blog_title, blog_content, blog_url, original_chars) = message_record
+    
+    # Each message's report is collected and printed in one write
+    report = [
+        f"📋 Message {i}/{total} (ID: {msg_id})",
+        f"   Scheduled for: {scheduled_for}",
+        f"   Blog: {blog_title}",
+        f"   Original length: {original_chars} characters",
+        "",
+        "📄 Original Message:",
+        "-" * 40,
+        original_text,
+        "",
+    ]
+    
+    if new_text:
+        # Both word counts come from the extractor, so they compare like for like
+        new_words = extractor._count_words(new_text)
+        
+        # Show the difference
+        char_diff = len(new_text) - original_chars
+        word_diff = new_words - extractor._count_words(original_text)
+        
+        report += [
+            "✅ Successfully regenerated!",
+            "",
+            "📄 New Message:",
+            "-" * 40,
+            new_text,
+            "",
+            f"📊 New length: {len(new_text)} characters ({new_words} words)",
+            "",
+            f"📈 Improvement: +{char_diff} characters, +{word_diff} words",
+        ]
+        
+        # Update the database with the new message
+        try:
+            db.update_message_text(msg_id, new_text)
+            report.append(f"💾 Message {msg_id} updated in database")
+        except Exception as e:
+            report.append(f"❌ Failed to update database: {e}")
+    else:
+        report.append("❌ Failed to regenerate message")
+    
+    report += ["=" * 60, ""]
+    print("\n".join(report))
+
 def main():
     """Main function to process short messages."""
     print("🔍 Checking for short unposted messages...")
@@ -117,51 +187,15 @@ def main():
     print(f"   (Messages shorter than 280 characters that haven't been posted yet)")
     print()
     
-    # Process each short message
-    for i, message_record in enumerate(short_messages, 1):
-        msg_id, blog_post_id, msg_index, original_text, scheduled_for, blog_title, blog_content, blog_url = message_record
-        
-        print(f"📋 Message {i}/{len(short_messages)} (ID: {msg_id})")
-        print(f"   Scheduled for: {scheduled_for}")
-        print(f"   Blog: {blog_title}")
-        print(f"   Original length: {len(original_text)} characters")
-        print()
-        
-        print("📄 Original Message:")
-        print("-" * 40)
-        print(original_text)
-        print()
-        
-        # Regenerate the message
-        print("🔄 Regenerating with Anthropic...")
-        new_text = regenerate_message(extractor, original_text, blog_title, blog_content)
-        
-        if new_text:
-            print("✅ Successfully regenerated!")
-            print()
-            print("📄 New Message:")
-            print("-" * 40)
-            print(new_text)
-            print()
-            print(f"📊 New length: {len(new_text)} characters ({extractor._count_words(new_text)} words)")
-            print()
-            
-            # Show the difference
-            char_diff = len(new_text) - len(original_text)
-            word_diff = extractor._count_words(new_text) - extractor._count_words(original_text)
-            print(f"📈 Improvement: +{char_diff} characters, +{word_diff} words")
-            
-            # Update the database with the new message
-            try:
-                db.update_message_text(msg_id, new_text)
-                print(f"💾 Message {msg_id} updated in database")
-            except Exception as e:
-                print(f"❌ Failed to update database: {e}")
-        else:
-            print("❌ Failed to regenerate message")
-        
-        print("=" * 60)
-        print()
+    # Regenerate concurrently (each call is an Anthropic round trip); database
+    # updates and output stay on this thread as results arrive
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(short_messages))) as executor:
+        futures = {
+            executor.submit(regenerate_message, extractor, record[3], record[5], record[6]): record
+            for record in short_messages
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            report_regenerated_message(db, extractor, futures[future], future.result(), i, len(short_messages))
     
     print(f"🎉 Processed {len(short_messages)} messages")
     print("💾 All regenerated messages have been updated in the database")
@@ -3,27 +3,37 @@
 Script to regenerate all unposted messages in the database using the updated prompt.
 Only processes messages that haven't been posted to any platform yet.
 Also reschedules messages that were scheduled for dates in the past.
+
+Regeneration goes through the Message Batches API; pass --no-batch to send
+the requests directly instead (faster, at full price). A batch that hasn't
+finished within BATCH_MAX_WAIT is canceled and its unfinished requests are
+sent directly.
 """
+import hashlib
 import os
 import sys
-import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import pytz
 from database import Database
 from content_extractor import ContentExtractor
 from config import Config
 
-def find_unposted_messages(db):
-    """
-    Find all messages that haven't been posted yet.
-    
-    Args:
-        db: Database instance
-    
-    Returns:
-        List of message records that need regeneration
-    """
-    query = """
+REGENERATION_MODEL = "claude-sonnet-4-20250514"
+
+# Seconds between Message Batches status checks
+BATCH_POLL_INTERVAL = 30
+# Seconds to wait for a batch before canceling it, well inside the
+# workflow job's time limit
+BATCH_MAX_WAIT = 60 * 60
+
+# Concurrent requests when not using a batch (--no-batch, or batch failure)
+MAX_WORKERS = 10
+# Client retries (with exponential backoff) on rate limits and overload
+MAX_API_RETRIES = 5
+
+UNPOSTED_MESSAGES_SQL = """
     SELECT 
         pm.id,
         pm.blog_post_id,
@@ -41,35 +51,44 @@ def find_unposted_messages(db):
         AND pm.scheduled_for IS NOT NULL
     ORDER BY pm.scheduled_for ASC
     """
+
+def find_unposted_messages(db):
+    """
+    Find all messages that haven't been posted yet.
     
-    with sqlite3.connect(db.db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+    Args:
+        db: Database instance
+    
+    Returns:
+        List of message records that need regeneration
+    """
+    return db.conn.execute(UNPOSTED_MESSAGES_SQL).fetchall()
 
-def regenerate_message(extractor, original_text, blog_title, blog_content):
+def build_regeneration_request(msg_id, original_text, blog_title, blog_content):
     """
-    Regenerate a message using Anthropic with the updated prompt.
+    Build the Message Batches request that regenerates one message with the updated prompt.
     
     Args:
-        extractor: ContentExtractor instance
+        msg_id: Message ID (used as the request's custom_id)
         original_text: Original message text
         blog_title: Blog post title
         blog_content: Blog post content
     
     Returns:
-        New regenerated message text
+        Batch request dict
     """
     # Use the updated prompt from content_extractor
-    # This creates a new message in the same style as the extraction prompt
-    prompt = f"""You are a social media content strategist. I have a blog post that I want to promote on LinkedIn and X (Twitter).
+    # This creates a new message in the same style as the extraction prompt.
+    # The blog part is identical for every message of a post, so it goes in a
+    # cached system block and later messages of the post reuse it.
+    blog_context = f"""You are a social media content strategist. I have a blog post that I want to promote on LinkedIn and X (Twitter).
 
 Blog Title: {blog_title}
 
 Blog Content:
-{blog_content}
+{blog_content}"""
 
-I have an existing social media message from this blog post that I'd like you to regenerate with fresh, engaging content:
+    prompt = f"""I have an existing social media message from this blog post that I'd like you to regenerate with fresh, engaging content:
 
 Existing Message: {original_text}
 
@@ -87,21 +106,112 @@ Please create a new, distinct social media message that:
 
 Return only the new message text, no additional formatting, numbering, hashtags, emojis, or explanations."""
 
-    try:
-        message = extractor.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=2000,
-            temperature=0.7,
-            messages=[
+    return {
+        "custom_id": f"msg-{msg_id}",
+        "params": {
+            "model": REGENERATION_MODEL,
+            "max_tokens": 2000,
+            "temperature": 0.7,
+            "system": [
+                {"type": "text", "text": blog_context, "cache_control": {"type": "ephemeral"}}
+            ],
+            "messages": [
                 {"role": "user", "content": prompt}
             ]
-        )
+        }
+    }
+
+def regeneration_cache_key(request):
+    """Cache key for a regeneration request, hashed like ContentExtractor's extraction keys."""
+    params = request["params"]
+    blog_context = params["system"][0]["text"]
+    prompt = params["messages"][0]["content"]
+    return hashlib.blake2b(
+        f"{params['model']}\0{blog_context}\0{prompt}".encode('utf-8'), digest_size=16
+    ).hexdigest()
+
+def run_regeneration_batch(client, batch_requests):
+    """
+    Submit regeneration requests as one Message Batch and wait for the results.
+    
+    Batches are processed asynchronously at half the token price, which suits
+    this offline script better than one blocking request per message.
+    
+    If the batch is still running after BATCH_MAX_WAIT seconds it is canceled,
+    and only the requests that finished before that are returned. The same
+    goes for an error while polling or reading results once the batch exists,
+    so its finished requests aren't paid for again.
+    
+    Args:
+        client: Anthropic client
+        batch_requests: Requests from build_regeneration_request
+    
+    Returns:
+        Dict mapping custom_id to the regenerated text, for succeeded requests
+    """
+    batch = client.messages.batches.create(requests=batch_requests)
+    print(f"📦 Submitted batch {batch.id} with {len(batch_requests)} requests")
+    
+    new_texts = {}
+    try:
+        deadline = time.monotonic() + BATCH_MAX_WAIT
+        canceled = False
+        while batch.processing_status != "ended":
+            if not canceled and time.monotonic() >= deadline:
+                print(f"⏰ Batch {batch.id} not finished after {BATCH_MAX_WAIT}s, canceling it")
+                client.messages.batches.cancel(batch.id)
+                canceled = True
+            time.sleep(BATCH_POLL_INTERVAL)
+            batch = client.messages.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            print(f"   ⏳ {batch.processing_status}: {counts.succeeded} succeeded, "
+                  f"{counts.errored} errored, {counts.processing} processing")
         
+        for entry in client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                new_texts[entry.custom_id] = entry.result.message.content[0].text.strip()
+            else:
+                print(f"Error regenerating {entry.custom_id}: {entry.result.type}")
+    except Exception as e:
+        print(f"⚠️  Lost track of batch {batch.id}, canceling it: {e}")
+        try:
+            client.messages.batches.cancel(batch.id)
+        except Exception as cancel_error:
+            print(f"⚠️  Could not cancel batch {batch.id}: {cancel_error}")
+    return new_texts
+
+def run_regeneration_concurrently(client, batch_requests):
+    """
+    Send regeneration requests directly, several at a time.
+    
+    Faster turnaround than a batch, at full token price.
+    
+    Args:
+        client: Anthropic client
+        batch_requests: Requests from build_regeneration_request
+    
+    Returns:
+        Dict mapping custom_id to the regenerated text, for succeeded requests
+    """
+    client = client.with_options(max_retries=MAX_API_RETRIES)
+    
+    def regenerate(request):
+        message = client.messages.create(**request["params"])
         return message.content[0].text.strip()
     
-    except Exception as e:
-        print(f"Error regenerating message: {e}")
-        return None
+    new_texts = {}
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(batch_requests))) as executor:
+        futures = {
+            executor.submit(regenerate, request): request["custom_id"]
+            for request in batch_requests
+        }
+        for future in as_completed(futures):
+            custom_id = futures[future]
+            try:
+                new_texts[custom_id] = future.result()
+            except Exception as e:
+                print(f"Error regenerating {custom_id}: {e}")
+    return new_texts
 
 def main():
     """Main function to process unposted messages."""
@@ -133,13 +243,29 @@ def main():
     current_time = datetime.now(eastern)
     current_date = current_time.date()
     
-    # Process each unposted message
+    # Scheduled times of all messages, loaded once and kept current as
+    # messages are rescheduled below
+    sched_by_id = {}
+    for other_id, other_scheduled_for in db.conn.execute(
+        "SELECT id, scheduled_for FROM posted_messages WHERE scheduled_for IS NOT NULL"
+    ):
+        try:
+            dt = datetime.fromisoformat(other_scheduled_for)
+        except (ValueError, TypeError):
+            continue
+        sched_by_id[other_id] = eastern.localize(dt) if dt.tzinfo is None else dt.astimezone(eastern)
+    
+    # Reschedule past-due messages and queue every message for regeneration
+    batch_requests = []
     for i, message_record in enumerate(unposted_messages, 1):
         msg_id, blog_post_id, msg_index, original_text, scheduled_for_str, blog_title, blog_content, blog_url = message_record
         
-        print(f"📋 Message {i}/{len(unposted_messages)} (ID: {msg_id})")
-        print(f"   Blog: {blog_title}")
-        print(f"   Current length: {len(original_text)} characters")
+        # Each message's report is collected and printed in one write
+        report = [
+            f"📋 Message {i}/{len(unposted_messages)} (ID: {msg_id})",
+            f"   Blog: {blog_title}",
+            f"   Current length: {len(original_text)} characters",
+        ]
         
         # Parse scheduled_for date
         scheduled_for = None
@@ -154,46 +280,29 @@ def main():
                     scheduled_for = scheduled_for.astimezone(eastern)
                 
                 scheduled_date = scheduled_for.date()
-                print(f"   Scheduled for: {scheduled_for_str} ({scheduled_date})")
+                report.append(f"   Scheduled for: {scheduled_for_str} ({scheduled_date})")
                 
                 # Check if scheduled date is in the past
                 if scheduled_date < current_date:
                     needs_reschedule = True
-                    print(f"   ⚠️  Scheduled date is in the past! Will reschedule to future slot.")
+                    report.append(f"   ⚠️  Scheduled date is in the past! Will reschedule to future slot.")
                 else:
-                    print(f"   ✅ Scheduled date is in the future")
+                    report.append(f"   ✅ Scheduled date is in the future")
             except (ValueError, TypeError) as e:
-                print(f"   ⚠️  Could not parse scheduled_for: {scheduled_for_str}")
+                report.append(f"   ⚠️  Could not parse scheduled_for: {scheduled_for_str}")
                 needs_reschedule = True
         else:
-            print(f"   ⚠️  No scheduled_for date set")
+            report.append(f"   ⚠️  No scheduled_for date set")
             needs_reschedule = True
         
-        print()
+        report.append("")
         
         # Reschedule if needed
         if needs_reschedule:
-            print("📅 Rescheduling to future available slot...")
+            report.append("📅 Rescheduling to future available slot...")
             try:
-                # Get all existing scheduled times (excluding this message by ID)
-                with sqlite3.connect(db.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        SELECT scheduled_for FROM posted_messages 
-                        WHERE scheduled_for IS NOT NULL AND id != ?
-                    """, (msg_id,))
-                    
-                    other_scheduled = []
-                    for row in cursor.fetchall():
-                        try:
-                            dt = datetime.fromisoformat(row[0])
-                            if dt.tzinfo is None:
-                                dt = eastern.localize(dt)
-                            else:
-                                dt = dt.astimezone(eastern)
-                            other_scheduled.append(dt)
-                        except (ValueError, TypeError):
-                            continue
+                # All existing scheduled times, excluding this message's
+                other_scheduled = [dt for other_id, dt in sched_by_id.items() if other_id != msg_id]
                 
                 # Find a new slot starting from tomorrow
                 new_schedules = db.scheduler.schedule_messages(
@@ -205,49 +314,121 @@ def main():
                 if new_schedules:
                     new_schedule_time = new_schedules[0]
                     db.update_message_schedule(msg_id, new_schedule_time)
+                    sched_by_id[msg_id] = new_schedule_time
                     scheduled_for = new_schedule_time
-                    print(f"   ✅ Rescheduled to: {new_schedule_time.isoformat()}")
+                    report.append(f"   ✅ Rescheduled to: {new_schedule_time.isoformat()}")
                     rescheduled_count += 1
                 else:
-                    print(f"   ❌ Could not find available slot. Schedule may be full.")
-                    print(f"   ⚠️  Message will keep old schedule but may not be posted.")
+                    report += [
+                        f"   ❌ Could not find available slot. Schedule may be full.",
+                        f"   ⚠️  Message will keep old schedule but may not be posted.",
+                    ]
             except Exception as e:
-                print(f"   ❌ Failed to reschedule: {e}")
-                print(f"   ⚠️  Message will keep old schedule but may not be posted.")
-            print()
+                report += [
+                    f"   ❌ Failed to reschedule: {e}",
+                    f"   ⚠️  Message will keep old schedule but may not be posted.",
+                ]
+            report.append("")
         
-        print("📄 Current Message:")
-        print("-" * 40)
-        print(original_text[:200] + ("..." if len(original_text) > 200 else ""))
-        print()
+        report += [
+            "📄 Current Message:",
+            "-" * 40,
+            original_text[:200] + ("..." if len(original_text) > 200 else ""),
+            "",
+        ]
         
-        # Regenerate the message
-        print("🔄 Regenerating with updated prompt...")
-        new_text = regenerate_message(extractor, original_text, blog_title, blog_content)
+        batch_requests.append((
+            blog_post_id,
+            build_regeneration_request(msg_id, original_text, blog_title, blog_content)
+        ))
         
-        if new_text:
-            print("✅ Successfully regenerated!")
-            print()
-            print("📄 New Message:")
-            print("-" * 40)
-            print(new_text[:200] + ("..." if len(new_text) > 200 else ""))
-            print()
-            print(f"📊 New length: {len(new_text)} characters ({extractor._count_words(new_text)} words)")
-            print()
-            
-            # Update the database with the new message
+        report += [
+            "=" * 60,
+            "",
+        ]
+        print("\n".join(report))
+    
+    # Requests for the same blog post go out together, so they share its
+    # prompt-cache entry while it's warm
+    batch_requests = [request for _, request in sorted(batch_requests, key=lambda pair: pair[0])]
+    
+    # Results are cached by prompt, so a rerun after an interrupted run
+    # doesn't pay again for messages that were already regenerated
+    new_texts = {}
+    pending_requests = []
+    for request in batch_requests:
+        cached = db.get_cached_extraction(regeneration_cache_key(request))
+        if cached:
+            new_texts[request["custom_id"]] = cached[0]
+        else:
+            pending_requests.append(request)
+    if new_texts:
+        print(f"♻️  Using cached regenerations for {len(new_texts)} messages")
+    
+    # Regenerate the rest in one batch, unless a quick turnaround is wanted
+    if pending_requests:
+        print("🔄 Regenerating with updated prompt...")
+        results = None
+        if "--no-batch" not in sys.argv:
             try:
-                db.update_message_text(msg_id, new_text)
-                print(f"💾 Message {msg_id} updated in database")
-                regenerated_count += 1
+                results = run_regeneration_batch(extractor.client, pending_requests)
             except Exception as e:
-                print(f"❌ Failed to update database: {e}")
-                failed_count += 1
+                print(f"⚠️  Could not submit batch, sending requests directly: {e}")
+        if results is None:
+            results = run_regeneration_concurrently(extractor.client, pending_requests)
         else:
-            print("❌ Failed to regenerate message")
+            # Requests the batch didn't complete (canceled at the deadline or
+            # after a polling error, expired or errored) get one more try directly
+            unfinished = [request for request in pending_requests if request["custom_id"] not in results]
+            if unfinished:
+                print(f"🔁 Sending {len(unfinished)} unfinished requests directly...")
+                results.update(run_regeneration_concurrently(extractor.client, unfinished))
+        
+        for request in pending_requests:
+            new_text = results.get(request["custom_id"])
+            if new_text:
+                db.save_cached_extraction(regeneration_cache_key(request), [new_text])
+                new_texts[request["custom_id"]] = new_text
+    print()
+    
+    # (msg_id, new_text) pairs, written in a single transaction at the end
+    updates = []
+    for message_record in unposted_messages:
+        msg_id = message_record[0]
+        new_text = new_texts.get(f"msg-{msg_id}")
+        
+        report = [f"📋 Message ID: {msg_id}"]
+        if new_text:
+            report += [
+                "✅ Successfully regenerated!",
+                "",
+                "📄 New Message:",
+                "-" * 40,
+                new_text[:200] + ("..." if len(new_text) > 200 else ""),
+                "",
+                f"📊 New length: {len(new_text)} characters ({extractor._count_words(new_text)} words)",
+                "",
+            ]
+            updates.append((msg_id, new_text))
+        else:
+            report.append("❌ Failed to regenerate message")
             failed_count += 1
         
-        print("=" * 60)
+        report += [
+            "=" * 60,
+            "",
+        ]
+        print("\n".join(report))
+    
+    # Update the database with the new messages
+    if updates:
+        try:
+            db.update_message_texts(updates)
+            print(f"💾 {len(updates)} messages updated in database")
+            regenerated_count += len(updates)
+        except Exception as e:
+            print(f"❌ Failed to update database: {e}")
+            failed_count += len(updates)
         print()
     
     print(f"🎉 Regeneration complete!")
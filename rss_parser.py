@@ -4,30 +4,58 @@ Supports RSS, Atom, and JSON Feed formats.
 """
 import feedparser
 import requests
+import functools
 import json
-from datetime import datetime
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import List, Dict, Optional, Set
+from lxml import etree
+from lxml import html as lxml_html
 from config import Config
 
 
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=1)
+def _parse_min_date(value: str) -> date:
+    """Parse the configured minimum post date once rather than per feed entry."""
+    return datetime.fromisoformat(value).date()
+
+
 class RSSParser:
     """Parser for blog RSS/JSON feeds."""
     
+    # Upper bound on entries parsed concurrently (lxml releases the GIL while parsing)
+    MAX_WORKERS = 8
+    
+    # Upper bound on HTML parsed per entry; far above any real post, it only
+    # bounds the work (and the extraction prompt) for a pathological feed
+    MAX_HTML_CHARS = 200_000
+    
     def __init__(self, feed_url: str = None):
         """Initialize feed parser with feed URL."""
         self.feed_url = feed_url or Config.BLOG_RSS_FEED_URL
+        # URLs of posts that are already stored, skipped before HTML cleaning
+        self.skip_urls: Set[str] = set()
+        # Feed entries left out by the last fetch because of skip_urls
+        self.skipped_count = 0
     
-    def fetch_latest_posts(self, limit: int = 5) -> List[Dict]:
+    def fetch_latest_posts(self, limit: int = 5, skip_urls: Optional[Set[str]] = None) -> List[Dict]:
         """
         Fetch the latest posts from RSS/Atom/JSON feed.
         
         Args:
             limit: Maximum number of posts to fetch
+            skip_urls: URLs of already processed posts to leave out
             
         Returns:
             List of dictionaries containing post information
         """
+        self.skip_urls = skip_urls or set()
+        self.skipped_count = 0
         try:
             print(f"Fetching from: {self.feed_url}", flush=True)
             
@@ -36,9 +64,27 @@ class RSSParser:
                 print("Detected JSON feed format", flush=True)
                 return self._fetch_json_feed(limit)
             
+            # Conditional GET: an unchanged feed answers 304 with no body, and
+            # the posts parsed last time are reused
+            cache = self._load_feed_cache()
+            
             # Try parsing with feedparser (supports RSS, Atom, and JSON Feed)
             print("Parsing feed with feedparser...", flush=True)
-            feed = feedparser.parse(self.feed_url)
+            feed = feedparser.parse(self.feed_url, etag=cache.get('etag'), modified=cache.get('modified'))
+            if feed.get('status') == 304:
+                # Stale and already processed entries were never parsed, so the
+                # cache only holds for the same entries and cutoff date, and if
+                # none of the skipped posts has since been removed. Posts
+                # processed since then are left out like a fresh parse would.
+                if (cache.get('limit') == limit
+                        and cache.get('min_date') == Config.MINIMUM_POST_DATE
+                        and self.skip_urls.issuperset(cache.get('skipped_urls', []))):
+                    print("Feed not modified since last fetch, using cached posts", flush=True)
+                    posts = [post for post in cache['posts'] if post.get('url') not in self.skip_urls]
+                    self.skipped_count = len(cache.get('skipped_urls', [])) + len(cache['posts']) - len(posts)
+                    return posts
+                # Cache doesn't cover this request; fetch the full feed
+                feed = feedparser.parse(self.feed_url)
             print("Feed parsed successfully", flush=True)
             
             # Check for errors
@@ -46,12 +92,12 @@ class RSSParser:
                 if hasattr(feed, 'bozo_exception'):
                     print(f"Feed parsing warning: {feed.bozo_exception}")
             
-            posts = []
+            entries = feed.entries[:limit]
+            posts = self._parse_all(self._parse_entry, entries)
             
-            for entry in feed.entries[:limit]:
-                post = self._parse_entry(entry)
-                if post and self._is_post_recent_enough(post):
-                    posts.append(post)
+            skipped_urls = [entry.get('link') for entry in entries if entry.get('link') in self.skip_urls]
+            self.skipped_count = len(skipped_urls)
+            self._save_feed_cache(feed, posts, limit, skipped_urls)
             
             return posts
         
@@ -59,6 +105,43 @@ class RSSParser:
             print(f"Error fetching feed: {e}")
             return []
     
+    def _parse_all(self, parse, entries: List) -> List[Dict]:
+        """Parse feed entries concurrently, keeping feed order and dropping skipped ones."""
+        if len(entries) <= 1:
+            return [post for post in map(parse, entries) if post]
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(entries))) as executor:
+            return [post for post in executor.map(parse, entries) if post]
+    
+    def _load_feed_cache(self) -> Dict:
+        """Get the validators and posts saved from the last fetch of this feed, if any."""
+        try:
+            with open(Config.FEED_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if cache.get('feed_url') == self.feed_url else {}
+    
+    def _save_feed_cache(self, feed, posts: List[Dict], limit: int, skipped_urls: List[str]):
+        """Save the feed's ETag/Last-Modified and parsed posts for the next conditional fetch."""
+        etag = feed.get('etag')
+        modified = feed.get('modified')
+        if not etag and not modified:
+            return
+        try:
+            os.makedirs(os.path.dirname(Config.FEED_CACHE_PATH) or '.', exist_ok=True)
+            with open(Config.FEED_CACHE_PATH, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'feed_url': self.feed_url,
+                    'etag': etag,
+                    'modified': modified,
+                    'limit': limit,
+                    'min_date': Config.MINIMUM_POST_DATE,
+                    'skipped_urls': skipped_urls,
+                    'posts': posts
+                }, f)
+        except OSError as e:
+            print(f"Warning: Could not save feed cache: {e}")
+    
     def _fetch_json_feed(self, limit: int = 5) -> List[Dict]:
         """
         Fetch posts from a JSON Feed.
@@ -76,23 +159,26 @@ class RSSParser:
             response.raise_for_status()
             
             feed_data = response.json()
-            posts = []
-            
             items = feed_data.get('items', [])[:limit]
-            for item in items:
-                post = self._parse_json_item(item)
-                if post and self._is_post_recent_enough(post):
-                    posts.append(post)
-            
-            return posts
+            self.skipped_count = sum(1 for item in items if item.get('url', '') in self.skip_urls)
+            return self._parse_all(self._parse_json_item, items)
         
         except Exception as e:
             print(f"Error fetching JSON feed: {e}")
             return []
     
     def _parse_json_item(self, item: Dict) -> Optional[Dict]:
-        """Parse a single JSON Feed item."""
+        """Parse a single JSON Feed item, or return None if it's too old or malformed."""
         try:
+            # Check the date first so old items skip HTML cleaning
+            published_date = item.get('date_published', datetime.now().isoformat())
+            title = item.get('title', 'Untitled')
+            if not self._is_post_recent_enough({'published_date': published_date, 'title': title}):
+                return None
+            if item.get('url', '') in self.skip_urls:
+                print(f"⏭️  Already processed: {title}")
+                return None
+            
             # Extract content (JSON Feed uses content_html or content_text)
             content = ""
             if 'content_html' in item:
@@ -105,12 +191,9 @@ class RSSParser:
             # Clean HTML from content
             clean_content = self._clean_html(content)
             
-            # Extract published date
-            published_date = item.get('date_published', datetime.now().isoformat())
-            
             return {
                 'url': item.get('url', ''),
-                'title': item.get('title', 'Untitled'),
+                'title': title,
                 'content': clean_content,
                 'published_date': published_date,
                 'summary': item.get('summary', clean_content[:500])
@@ -121,29 +204,31 @@ class RSSParser:
             return None
     
     def _parse_entry(self, entry) -> Optional[Dict]:
-        """Parse a single RSS feed entry."""
+        """Parse a single RSS feed entry, or return None if it's too old or malformed."""
         try:
+            # Extract published date first so old entries skip HTML cleaning
+            parsed_date = entry.get('published_parsed') or entry.get('updated_parsed')
+            if parsed_date:
+                published_date = datetime(*parsed_date[:6]).isoformat()
+            else:
+                published_date = datetime.now().isoformat()
+            
+            if not self._is_post_recent_enough({'published_date': published_date, 'title': entry.title}):
+                return None
+            if entry.link in self.skip_urls:
+                print(f"⏭️  Already processed: {entry.title}")
+                return None
+            
             # Extract content
-            content = ""
-            if hasattr(entry, 'content'):
-                content = entry.content[0].value
-            elif hasattr(entry, 'summary'):
-                content = entry.summary
-            elif hasattr(entry, 'description'):
-                content = entry.description
+            content_field = entry.get('content')
+            if content_field:
+                content = content_field[0].value
+            else:
+                content = entry.get('summary') or entry.get('description') or ""
             
             # Clean HTML from content
             clean_content = self._clean_html(content)
             
-            # Extract published date
-            published_date = None
-            if hasattr(entry, 'published_parsed'):
-                published_date = datetime(*entry.published_parsed[:6]).isoformat()
-            elif hasattr(entry, 'updated_parsed'):
-                published_date = datetime(*entry.updated_parsed[:6]).isoformat()
-            else:
-                published_date = datetime.now().isoformat()
-            
             return {
                 'url': entry.link,
                 'title': entry.title,
@@ -161,21 +246,17 @@ class RSSParser:
         if not html_content:
             return ""
         
-        soup = BeautifulSoup(html_content, 'lxml')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
+        html_content = html_content[:self.MAX_HTML_CHARS]
         
-        # Get text
-        text = soup.get_text()
+        # Parse with lxml directly rather than through a BeautifulSoup tree;
+        # the wrapping div keeps any text before the first tag
+        root = lxml_html.fragment_fromstring(html_content, create_parent='div')
         
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
+        # Remove script and style elements, keeping the text that follows them
+        etree.strip_elements(root, 'script', 'style', with_tail=False)
         
-        return text
+        # Get text and collapse whitespace runs
+        return _WHITESPACE_RE.sub(' ', root.text_content()).strip()
     
     def _is_post_recent_enough(self, post: Dict) -> bool:
         """
@@ -197,14 +278,14 @@ class RSSParser:
             # Parse the published date
             published_date = datetime.fromisoformat(published_date_str.replace('Z', '+00:00'))
             
-            # Parse the minimum date from configuration
-            min_date = datetime.fromisoformat(Config.MINIMUM_POST_DATE)
+            # Minimum date from configuration (parsed once, keyed on its value)
+            min_date = _parse_min_date(Config.MINIMUM_POST_DATE)
             
             # Check if the post is recent enough
-            is_recent = published_date.date() >= min_date.date()
+            is_recent = published_date.date() >= min_date
             
             if not is_recent:
-                print(f"Skipping post '{post.get('title', 'Untitled')}' - published {published_date.date()} (before {min_date.date()})")
+                print(f"Skipping post '{post.get('title', 'Untitled')}' - published {published_date.date()} (before {min_date})")
             
             return is_recent
             
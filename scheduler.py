@@ -7,10 +7,36 @@ Features:
 - Time slot management (4 slots per day: 9am, 11am, 1pm, 3pm EST)
 - Automatic scheduling to next available slot
 """
-from datetime import datetime, timedelta
-from typing import List, Optional
-import pytz
-import holidays
+import functools
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+
+@functools.lru_cache(maxsize=1)
+def _business_calendar(years: range) -> Tuple[Dict, FrozenSet[int], List[int]]:
+    """
+    Build the US holiday calendar for the given years.
+    
+    Returns:
+        The holidays object, holiday day ordinals (so lookups are int hashes
+        rather than going through the holidays library), and the sorted
+        business-day ordinals over the same years for bisect lookups
+    """
+    # Imported here so that importing this module (e.g. via database) doesn't
+    # pay for loading the holidays package until a scheduler is created
+    import holidays
+    
+    us_holidays = holidays.US(years=years)
+    holiday_ordinals = frozenset(d.toordinal() for d in us_holidays.keys())
+    first = date(years[0], 1, 1).toordinal()
+    last = date(years[-1], 12, 31).toordinal()
+    business_ordinals = [
+        o for o in range(first, last + 1)
+        if date.fromordinal(o).weekday() < 5 and o not in holiday_ordinals
+    ]
+    return us_holidays, holiday_ordinals, business_ordinals
 
 
 class PostScheduler:
@@ -19,17 +45,44 @@ class PostScheduler:
     # Time slots in Eastern Time (EST/EDT)
     TIME_SLOTS = [
         (9, 0),   # 9:00 AM
-        (13, 0),  # 1:00 PM
         (11, 0),  # 11:00 AM
+        (13, 0),  # 1:00 PM
         (15, 0),  # 3:00 PM
     ]
     
+    # Order in which a day's slots are filled (9am, 1pm, 11am, 3pm), so the
+    # first two posts of a day land in the morning and the afternoon
+    SLOT_FILL_ORDER = (0, 2, 1, 3)
+    
+    # Occupancy mask bit of each slot index: its position in SLOT_FILL_ORDER,
+    # so the lowest clear bit of a day's mask is the next slot to fill
+    _SLOT_BIT = {slot_index: 1 << rank for rank, slot_index in enumerate(SLOT_FILL_ORDER)}
+    _FULL_MASK = (1 << len(TIME_SLOTS)) - 1
+    
+    # Reverse lookup of a slot's index from its minute of day (hour * 60 + minute)
+    _SLOT_INDEX = {hour * 60 + minute: idx for idx, (hour, minute) in enumerate(TIME_SLOTS)}
+    
+    # Minute of day at which each slot's window ends (30 minutes after it starts)
+    _SLOT_BOUNDARIES = tuple(hour * 60 + minute + 30 for hour, minute in TIME_SLOTS)
+    
     MAX_POSTS_PER_DAY = 4
     
+    # Years whose US holidays are precomputed
+    HOLIDAY_YEARS = range(2024, 2030)
+    
     def __init__(self):
         """Initialize scheduler with US holidays."""
-        self.us_holidays = holidays.US(years=range(2024, 2030))
-        self.eastern = pytz.timezone('US/Eastern')
+        # Calendar data is computed once per process and shared by all instances
+        self.us_holidays, self._holiday_ordinals, self._business_ordinals = _business_calendar(self.HOLIDAY_YEARS)
+        self._business_day_cache: Dict[int, bool] = {}
+        # A zoneinfo zone can be attached directly to datetimes
+        self.eastern = ZoneInfo('US/Eastern')
+    
+    def to_eastern(self, dt: datetime) -> datetime:
+        """Convert a datetime to Eastern Time, treating naive datetimes as already Eastern."""
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=self.eastern)
+        return dt.astimezone(self.eastern)
     
     def is_business_day(self, date: datetime) -> bool:
         """
@@ -41,15 +94,17 @@ class PostScheduler:
         Returns:
             True if business day, False otherwise
         """
-        # Check if weekend (Saturday=5, Sunday=6)
-        if date.weekday() >= 5:
-            return False
-        
-        # Check if US federal holiday
-        if date.date() in self.us_holidays:
-            return False
-        
-        return True
+        ordinal = date.toordinal()
+        result = self._business_day_cache.get(ordinal)
+        if result is None:
+            # Not a weekend (Saturday=5, Sunday=6) or US federal holiday
+            if date.year in self.HOLIDAY_YEARS:
+                is_holiday = ordinal in self._holiday_ordinals
+            else:
+                is_holiday = date.date() in self.us_holidays
+            result = date.weekday() < 5 and not is_holiday
+            self._business_day_cache[ordinal] = result
+        return result
     
     def get_next_business_day(self, start_date: datetime) -> datetime:
         """
@@ -61,11 +116,24 @@ class PostScheduler:
         Returns:
             Next business day
         """
+        # Precomputed years: jump straight to the next business day
+        idx = bisect_left(self._business_ordinals, start_date.toordinal())
+        if start_date.year in self.HOLIDAY_YEARS and idx < len(self._business_ordinals):
+            next_day = date.fromordinal(self._business_ordinals[idx])
+            return datetime.combine(next_day, start_date.time(), tzinfo=start_date.tzinfo)
+        
         current = start_date
         while not self.is_business_day(current):
             current += timedelta(days=1)
         return current
     
+    def _next_business_ordinal(self, ordinal: int) -> int:
+        """Get the ordinal of the first business day on or after the given day ordinal."""
+        idx = bisect_left(self._business_ordinals, ordinal)
+        if self._business_ordinals[0] <= ordinal and idx < len(self._business_ordinals):
+            return self._business_ordinals[idx]
+        return self.get_next_business_day(datetime.fromordinal(ordinal)).toordinal()
+    
     def create_scheduled_time(self, date: datetime, slot_index: int) -> datetime:
         """
         Create a scheduled datetime for a specific time slot.
@@ -77,17 +145,11 @@ class PostScheduler:
         Returns:
             Datetime in Eastern Time with the specified slot
         """
-        if slot_index >= len(self.TIME_SLOTS):
-            slot_index = len(self.TIME_SLOTS) - 1
-        
-        hour, minute = self.TIME_SLOTS[slot_index]
+        # Out-of-range indexes fall back to the last slot
+        hour, minute = self.TIME_SLOTS[min(slot_index, len(self.TIME_SLOTS) - 1)]
         
         # Create datetime in Eastern timezone
-        scheduled = self.eastern.localize(
-            datetime(date.year, date.month, date.day, hour, minute, 0)
-        )
-        
-        return scheduled
+        return datetime(date.year, date.month, date.day, hour, minute, tzinfo=self.eastern)
     
     def get_available_slot(self, date: datetime, existing_posts: List[datetime]) -> Optional[int]:
         """
@@ -100,26 +162,36 @@ class PostScheduler:
         Returns:
             Available slot index (0-3), or None if day is full
         """
-        # Normalize existing posts to same date for comparison
-        existing_slots = []
-        for post_time in existing_posts:
-            # Convert to Eastern if needed
-            if post_time.tzinfo is None:
-                post_time = self.eastern.localize(post_time)
-            else:
-                post_time = post_time.astimezone(self.eastern)
-            
-            # Check if it's on the same date
-            if post_time.date() == date.date():
-                existing_slots.append((post_time.hour, post_time.minute))
-        
-        # Find first available slot
-        for idx, slot in enumerate(self.TIME_SLOTS):
-            if slot not in existing_slots:
-                return idx
+        return self._first_free_slot(self._build_occupancy(existing_posts).get(date.toordinal(), 0))
+    
+    def _build_occupancy(self, schedules: List[datetime]) -> Dict[int, int]:
+        """
+        Map each date's ordinal to a bitmask of its taken time slots.
         
-        # Day is full
-        return None
+        Args:
+            schedules: Already scheduled post times
+            
+        Returns:
+            Dict of Eastern date ordinal -> mask of taken slots (see _SLOT_BIT)
+        """
+        occupancy: Dict[int, int] = {}
+        for post_time in schedules:
+            post_time = self.to_eastern(post_time)
+            
+            # Times outside the slots don't take one
+            slot_index = self._SLOT_INDEX.get(post_time.hour * 60 + post_time.minute)
+            if slot_index is not None:
+                ordinal = post_time.toordinal()
+                occupancy[ordinal] = occupancy.get(ordinal, 0) | self._SLOT_BIT[slot_index]
+        return occupancy
+    
+    def _first_free_slot(self, mask: int) -> Optional[int]:
+        """Get the next slot index to fill given a day's occupancy mask, or None if the day is full."""
+        free = ~mask & self._FULL_MASK
+        if not free:
+            return None
+        # Lowest set bit of the free mask is the earliest free slot in fill order
+        return self.SLOT_FILL_ORDER[(free & -free).bit_length() - 1]
     
     def can_schedule_within_days(
         self,
@@ -140,13 +212,29 @@ class PostScheduler:
         Returns:
             True if all messages can fit within max_days, False otherwise
         """
+        return self._fits_within_days(
+            num_messages, self._build_occupancy(existing_schedules), max_days, self._normalize_start(start_date)
+        )
+    
+    def _normalize_start(self, start_date: Optional[datetime]) -> datetime:
+        """Default a scheduling start to tomorrow and make it timezone-aware."""
         if start_date is None:
             start_date = datetime.now(self.eastern) + timedelta(days=1)
         
         # Ensure start date is timezone-aware
         if start_date.tzinfo is None:
-            start_date = self.eastern.localize(start_date)
+            start_date = start_date.replace(tzinfo=self.eastern)
         
+        return start_date
+    
+    def _fits_within_days(
+        self,
+        num_messages: int,
+        occupancy: Dict[int, int],
+        max_days: int,
+        start_date: datetime
+    ) -> bool:
+        """can_schedule_within_days against an occupancy map, which is left unchanged."""
         # Calculate cutoff date
         cutoff_date = start_date + timedelta(days=max_days)
         
@@ -155,21 +243,32 @@ class PostScheduler:
         current_date = self.get_next_business_day(current_date)
         
         scheduled_count = 0
-        temp_schedules = []
         
-        # Try to schedule all messages
+        # Messages go one per business day, so within the precomputed years
+        # this is a closed-form check: the next num_messages business days
+        # must all start before the cutoff and none of them may be full
+        if current_date.year in self.HOLIDAY_YEARS:
+            start = bisect_left(self._business_ordinals, current_date.toordinal())
+            days = self._business_ordinals[start:start + num_messages]
+            if len(days) == num_messages:
+                # First day whose midnight is at or past the cutoff
+                end_ordinal = cutoff_date.toordinal() + (cutoff_date.time() != time.min)
+                return (not days or days[-1] < end_ordinal) and all(
+                    occupancy.get(o, 0) != self._FULL_MASK for o in days
+                )
+        
+        # Try to schedule all messages (each day is only visited once, so
+        # taken slots don't need recording)
         for _ in range(num_messages):
             # Check if we've exceeded the time limit
             if current_date >= cutoff_date:
                 return False  # Can't fit all messages within max_days
             
             # Find available slot on current date
-            slot_index = self.get_available_slot(current_date, existing_schedules + temp_schedules)
+            slot_index = self._first_free_slot(occupancy.get(current_date.toordinal(), 0))
             
             if slot_index is not None:
                 # Slot available on current date
-                scheduled_time = self.create_scheduled_time(current_date, slot_index)
-                temp_schedules.append(scheduled_time)
                 scheduled_count += 1
             else:
                 # Day is full, move to next business day
@@ -208,56 +307,110 @@ class PostScheduler:
         Raises:
             ValueError: If unable to schedule within max_days (if specified)
         """
-        if start_date is None:
-            start_date = datetime.now(self.eastern) + timedelta(days=1)
+        start_date = self._normalize_start(start_date)
+        
+        # Empty schedule: every message takes the first slot of consecutive
+        # business days, read straight off the precomputed days
+        if not existing_schedules and max_days is None:
+            current_date = self.get_next_business_day(
+                start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+            )
+            if current_date.year in self.HOLIDAY_YEARS:
+                start = bisect_left(self._business_ordinals, current_date.toordinal())
+                days = self._business_ordinals[start:start + num_messages]
+                if len(days) == num_messages:
+                    return [
+                        self.create_scheduled_time(datetime.fromordinal(o), self.SLOT_FILL_ORDER[0])
+                        for o in days
+                    ]
+        
+        return self.schedule_many([num_messages], existing_schedules, start_date, max_days)[0]
+    
+    def schedule_many(
+        self,
+        num_messages_per_post: List[int],
+        existing_schedules: List[datetime],
+        start_date: Optional[datetime] = None,
+        max_days: Optional[int] = None
+    ) -> List[List[datetime]]:
+        """
+        Schedule the messages of several blog posts in one pass.
         
-        # Ensure start date is timezone-aware
-        if start_date.tzinfo is None:
-            start_date = self.eastern.localize(start_date)
+        Same as calling schedule_messages once per post, in order, with each
+        post's times added to existing_schedules, but taken slots are only
+        collected once. Each post still gets ONE MESSAGE PER DAY, starting
+        from start_date; different posts may share a day.
         
-        # Check if scheduling is possible within max_days
-        if max_days is not None:
-            if not self.can_schedule_within_days(num_messages, existing_schedules, max_days, start_date):
+        Args:
+            num_messages_per_post: Number of messages for each blog post
+            existing_schedules: List of already scheduled post times
+            start_date: Starting date (defaults to tomorrow)
+            max_days: Maximum days ahead to schedule (optional check, per post)
+            
+        Returns:
+            List of scheduled datetimes for each blog post, in the same order
+            
+        Raises:
+            ValueError: If a post can't be scheduled within max_days (if specified)
+        """
+        start_date = self._normalize_start(start_date)
+        
+        # Taken slots per date, updated as messages are placed
+        occupancy = self._build_occupancy(existing_schedules)
+        
+        # Normalize to start of day and ensure it's a business day
+        current_date = self.get_next_business_day(
+            start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        )
+        
+        schedules = []
+        for num_messages in num_messages_per_post:
+            # Check if scheduling is possible within max_days
+            if max_days is not None and not self._fits_within_days(num_messages, occupancy, max_days, start_date):
                 cutoff = start_date + timedelta(days=max_days)
                 raise ValueError(
                     f"Cannot schedule {num_messages} messages within {max_days} days "
                     f"(by {cutoff.strftime('%Y-%m-%d')}). Schedule is full."
                 )
+            schedules.append(self._place_messages(num_messages, current_date.toordinal(), occupancy))
         
-        # Normalize to start of day
-        current_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Ensure it's a business day
-        current_date = self.get_next_business_day(current_date)
+        return schedules
+    
+    def _place_messages(self, num_messages: int, ordinal: int, occupancy: Dict[int, int]) -> List[datetime]:
+        """
+        Schedule one blog post's messages, one per business day from the given day.
         
+        Args:
+            num_messages: Number of messages to schedule
+            ordinal: Ordinal of the first business day to use
+            occupancy: Taken slots per date; updated with the new messages
+            
+        Returns:
+            List of scheduled datetimes
+        """
         scheduled_times = []
         
+        # Days are walked as integer ordinals; a datetime is only built per scheduled message.
         # Schedule ONE MESSAGE PER DAY for this blog post
         for _ in range(num_messages):
             # Find available slot on current date
-            slot_index = self.get_available_slot(current_date, existing_schedules + scheduled_times)
+            slot_index = self._first_free_slot(occupancy.get(ordinal, 0))
             
-            if slot_index is not None:
-                # Slot available on current date
-                scheduled_time = self.create_scheduled_time(current_date, slot_index)
-                scheduled_times.append(scheduled_time)
-            else:
+            if slot_index is None:
                 # Day is full (4 posts already), move to next business day
-                current_date += timedelta(days=1)
-                current_date = self.get_next_business_day(current_date)
+                ordinal = self._next_business_ordinal(ordinal + 1)
                 
                 # Try first slot on new day
-                slot_index = self.get_available_slot(current_date, existing_schedules + scheduled_times)
-                if slot_index is not None:
-                    scheduled_time = self.create_scheduled_time(current_date, slot_index)
-                    scheduled_times.append(scheduled_time)
-                else:
+                slot_index = self._first_free_slot(occupancy.get(ordinal, 0))
+                if slot_index is None:
                     # Should never happen, but handle gracefully
-                    raise ValueError(f"Unable to schedule message on {current_date}")
+                    raise ValueError(f"Unable to schedule message on {date.fromordinal(ordinal)}")
+            
+            scheduled_times.append(self.create_scheduled_time(date.fromordinal(ordinal), slot_index))
+            occupancy[ordinal] = occupancy.get(ordinal, 0) | self._SLOT_BIT[slot_index]
             
             # MOVE TO NEXT DAY for next message from this blog post
-            current_date += timedelta(days=1)
-            current_date = self.get_next_business_day(current_date)
+            ordinal = self._next_business_ordinal(ordinal + 1)
         
         return scheduled_times
     
@@ -279,15 +432,8 @@ class PostScheduler:
             current_time = datetime.now(self.eastern)
         
         # Ensure both times are in Eastern timezone
-        if scheduled_time.tzinfo is None:
-            scheduled_time = self.eastern.localize(scheduled_time)
-        else:
-            scheduled_time = scheduled_time.astimezone(self.eastern)
-        
-        if current_time.tzinfo is None:
-            current_time = self.eastern.localize(current_time)
-        else:
-            current_time = current_time.astimezone(self.eastern)
+        scheduled_time = self.to_eastern(scheduled_time)
+        current_time = self.to_eastern(current_time)
         
         # Check if scheduled time is today or earlier
         if scheduled_time.date() < current_time.date():
@@ -318,20 +464,9 @@ class PostScheduler:
             2: 1pm slot
             3: 3pm slot
         """
-        hour = dt.hour
-        minute = dt.minute
-        
-        # Determine which slot this time falls into
-        if hour < 9 or (hour == 9 and minute < 30):
-            return 0  # 9am slot
-        elif hour < 11 or (hour == 11 and minute < 30):
-            return 1  # 11am slot
-        elif hour < 13 or (hour == 13 and minute < 30):
-            return 2  # 1pm slot
-        elif hour < 15 or (hour == 15 and minute < 30):
-            return 3  # 3pm slot
-        else:
-            return 3  # Default to 3pm slot for late times
+        # Each slot runs until 30 minutes past its start; later times stay in the 3pm slot
+        minute_of_day = dt.hour * 60 + dt.minute
+        return min(bisect_right(self._SLOT_BOUNDARIES, minute_of_day), len(self.TIME_SLOTS) - 1)
     
     def format_schedule_summary(self, scheduled_times: List[datetime]) -> str:
         """
@@ -343,16 +478,11 @@ class PostScheduler:
         Returns:
             Formatted string summary
         """
-        lines = ["Scheduled Posts:"]
-        
-        for idx, scheduled_time in enumerate(scheduled_times, 1):
-            # Convert to Eastern
-            et_time = scheduled_time.astimezone(self.eastern)
-            day_name = et_time.strftime('%A')
-            date_str = et_time.strftime('%Y-%m-%d')
-            time_str = et_time.strftime('%I:%M %p')
-            
-            lines.append(f"  {idx}. {day_name}, {date_str} at {time_str} ET")
+        # One strftime per entry, e.g. "Monday, 2025-10-20 at 09:00 AM", in Eastern
+        lines = ["Scheduled Posts:"] + [
+            f"  {idx}. {scheduled_time.astimezone(self.eastern).strftime('%A, %Y-%m-%d at %I:%M %p')} ET"
+            for idx, scheduled_time in enumerate(scheduled_times, 1)
+        ]
         
         return "\n".join(lines)
 
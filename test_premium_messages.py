@@ -2,7 +2,6 @@
 """
 Test script to verify Premium account message generation works correctly.
 """
-import os
 import sys
 from content_extractor import ContentExtractor
 from config import Config
@@ -11,7 +10,7 @@ def test_premium_message_generation():
     """Test that Premium account generates longer messages."""
     
     # Set Premium account to true
-    os.environ['X_PREMIUM_ACCOUNT'] = 'true'
+    Config.X_PREMIUM_ACCOUNT = True
     
     # Create a test blog post
     title = "The Future of AI in Cybersecurity"
@@ -2,16 +2,21 @@
 """
 Test script to verify word-based message generation logic works correctly.
 """
-import os
 import sys
+from config import Config
 from content_extractor import ContentExtractor
 
+# One extractor shared by all the tests below
+_EXTRACTOR = ContentExtractor()
+
 def test_word_counting():
     """Test word counting functionality."""
-    extractor = ContentExtractor()
+    extractor = _EXTRACTOR
+    # Report lines are collected and printed in one write
+    report = []
     
-    print("Testing Word Counting Functionality")
-    print("=" * 40)
+    report.append("Testing Word Counting Functionality")
+    report.append("=" * 40)
     
     # Test cases
     test_cases = [
@@ -25,16 +30,20 @@ def test_word_counting():
     for text, expected_words in test_cases:
         actual_words = extractor._count_words(text)
         status = "✅" if actual_words == expected_words else "❌"
-        print(f"{status} '{text}' -> {actual_words} words (expected {expected_words})")
+        report.append(f"{status} '{text}' -> {actual_words} words (expected {expected_words})")
     
-    print()
+    report.append("")
+    
+    print("\n".join(report))
 
 def test_word_truncation():
     """Test word-based truncation functionality."""
-    extractor = ContentExtractor()
+    extractor = _EXTRACTOR
+    # Report lines are collected and printed in one write
+    report = []
     
-    print("Testing Word Truncation Functionality")
-    print("=" * 40)
+    report.append("Testing Word Truncation Functionality")
+    report.append("=" * 40)
     
     # Test cases
     test_cases = [
@@ -47,20 +56,25 @@ def test_word_truncation():
     for text, max_words, expected in test_cases:
         result = extractor._truncate_to_word_limit(text, max_words)
         status = "✅" if result == expected else "❌"
-        print(f"{status} Truncate '{text}' to {max_words} words")
-        print(f"    Result: '{result}'")
-        print(f"    Expected: '{expected}'")
-        print()
+        report.append(f"{status} Truncate '{text}' to {max_words} words")
+        report.append(f"    Result: '{result}'")
+        report.append(f"    Expected: '{expected}'")
+        report.append("")
+    
+    print("\n".join(report))
 
 def test_platform_enhancement():
     """Test platform enhancement with word limits."""
-    extractor = ContentExtractor()
+    extractor = _EXTRACTOR
+    # Report lines are collected and printed in one write
+    report = []
     
-    print("Testing Platform Enhancement with Word Limits")
-    print("=" * 50)
+    report.append("Testing Platform Enhancement with Word Limits")
+    report.append("=" * 50)
     
     # Test message (simulate 100-200 word range)
     test_message = " ".join(["word"] * 150)  # 150 words
+    original_words = extractor._count_words(test_message)
     
     # Test LinkedIn enhancement
     linkedin_enhanced = extractor.enhance_for_platform(
@@ -71,14 +85,14 @@ def test_platform_enhancement():
     )
     
     linkedin_words = extractor._count_words(linkedin_enhanced)
-    print(f"LinkedIn enhancement:")
-    print(f"  Original: {extractor._count_words(test_message)} words")
-    print(f"  Enhanced: {linkedin_words} words")
-    print(f"  Status: {'✅' if linkedin_words > extractor._count_words(test_message) else '❌'}")
-    print()
+    report.append(f"LinkedIn enhancement:")
+    report.append(f"  Original: {original_words} words")
+    report.append(f"  Enhanced: {linkedin_words} words")
+    report.append(f"  Status: {'✅' if linkedin_words > original_words else '❌'}")
+    report.append("")
     
     # Test X enhancement with Premium account
-    os.environ['X_PREMIUM_ACCOUNT'] = 'true'
+    Config.X_PREMIUM_ACCOUNT = True
     
     x_enhanced = extractor.enhance_for_platform(
         test_message, 
@@ -89,15 +103,15 @@ def test_platform_enhancement():
     
     x_words = extractor._count_words(x_enhanced)
     x_chars = len(x_enhanced)
-    print(f"X (Premium) enhancement:")
-    print(f"  Original: {extractor._count_words(test_message)} words")
-    print(f"  Enhanced: {x_words} words, {x_chars} characters")
-    print(f"  Within 25k char limit: {'✅' if x_chars <= 25000 else '❌'}")
-    print(f"  Status: {'✅' if x_words > extractor._count_words(test_message) else '❌'}")
-    print()
+    report.append(f"X (Premium) enhancement:")
+    report.append(f"  Original: {original_words} words")
+    report.append(f"  Enhanced: {x_words} words, {x_chars} characters")
+    report.append(f"  Within 25k char limit: {'✅' if x_chars <= 25000 else '❌'}")
+    report.append(f"  Status: {'✅' if x_words > original_words else '❌'}")
+    report.append("")
     
     # Test X enhancement with standard account (should truncate)
-    os.environ['X_PREMIUM_ACCOUNT'] = 'false'
+    Config.X_PREMIUM_ACCOUNT = False
     
     x_standard_enhanced = extractor.enhance_for_platform(
         test_message, 
@@ -108,12 +122,14 @@ def test_platform_enhancement():
     
     x_standard_words = extractor._count_words(x_standard_enhanced)
     x_standard_chars = len(x_standard_enhanced)
-    print(f"X (Standard) enhancement:")
-    print(f"  Original: {extractor._count_words(test_message)} words")
-    print(f"  Enhanced: {x_standard_words} words, {x_standard_chars} characters")
-    print(f"  Within 280 char limit: {'✅' if x_standard_chars <= 280 else '❌'}")
-    print(f"  Truncated appropriately: {'✅' if x_standard_words <= 50 else '❌'}")
-    print()
+    report.append(f"X (Standard) enhancement:")
+    report.append(f"  Original: {original_words} words")
+    report.append(f"  Enhanced: {x_standard_words} words, {x_standard_chars} characters")
+    report.append(f"  Within 280 char limit: {'✅' if x_standard_chars <= 280 else '❌'}")
+    report.append(f"  Truncated appropriately: {'✅' if x_standard_words <= 50 else '❌'}")
+    report.append("")
+    
+    print("\n".join(report))
 
 def main():
     """Run all tests."""
@@ -8,11 +8,6 @@ import os
 import traceback
 from pathlib import Path
 from config import Config
-from database import Database
-from rss_parser import RSSParser
-from content_extractor import ContentExtractor
-from image_generator import ImageGenerator
-from x_poster import XPoster
 
 
 def test_x_post_real():
@@ -36,6 +31,14 @@ def test_x_post_real():
     
     print("✅ Configuration validated\n")
     
+    # Imported only once the configuration is known to be usable; these pull
+    # in anthropic, tweepy, feedparser and lxml
+    from database import Database
+    from rss_parser import RSSParser
+    from content_extractor import ContentExtractor
+    from image_generator import ImageGenerator
+    from x_poster import XPoster
+    
     # Ensure data directory exists (extract from database path)
     db_path = Config.DATABASE_PATH
     db_dir = os.path.dirname(db_path)
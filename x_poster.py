@@ -3,15 +3,43 @@ X (Twitter) posting module.
 """
 import tweepy
 import requests
-import tempfile
+import functools
+import io
 import os
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from config import Config
 
 
+@functools.lru_cache(maxsize=4)
+def _build_clients(api_key: str, api_secret: str, access_token: str,
+                   access_token_secret: str, bearer_token: Optional[str]) -> Tuple[tweepy.Client, tweepy.API]:
+    """Build the Tweepy clients once per set of credentials and share them across XPoster instances."""
+    # Client for v2 API (creating tweets)
+    client = tweepy.Client(
+        bearer_token=bearer_token,
+        consumer_key=api_key,
+        consumer_secret=api_secret,
+        access_token=access_token,
+        access_token_secret=access_token_secret,
+        wait_on_rate_limit=True
+    )
+    
+    # API v1.1 for media upload
+    auth = tweepy.OAuth1UserHandler(
+        api_key,
+        api_secret,
+        access_token,
+        access_token_secret
+    )
+    return client, tweepy.API(auth)
+
+
 class XPoster:
     """Post content to X (Twitter)."""
     
+    # Tweet length limit for Premium accounts
+    MAX_TWEET_LENGTH = 25000
+    
     def __init__(self, api_key: str = None, api_secret: str = None,
                  access_token: str = None, access_token_secret: str = None,
                  bearer_token: str = None):
@@ -30,6 +58,8 @@ class XPoster:
         self.access_token = access_token or Config.X_ACCESS_TOKEN
         self.access_token_secret = access_token_secret or Config.X_ACCESS_TOKEN_SECRET
         self.bearer_token = bearer_token or Config.X_BEARER_TOKEN
+        # Keep-alive connection pool for image downloads
+        self.session = requests.Session()
         
         self.client = None
         self._init_client()
@@ -55,24 +85,13 @@ class XPoster:
             return
         
         try:
-            # Client for v2 API (creating tweets)
-            self.client = tweepy.Client(
-                bearer_token=self.bearer_token,
-                consumer_key=self.api_key,
-                consumer_secret=self.api_secret,
-                access_token=self.access_token,
-                access_token_secret=self.access_token_secret,
-                wait_on_rate_limit=True
-            )
-            
-            # API v1.1 for media upload
-            auth = tweepy.OAuth1UserHandler(
+            self.client, self.api = _build_clients(
                 self.api_key,
                 self.api_secret,
                 self.access_token,
-                self.access_token_secret
+                self.access_token_secret,
+                self.bearer_token
             )
-            self.api = tweepy.API(auth)
             
         except Exception as e:
             print(f"Error initializing X client: {e}")
@@ -93,14 +112,17 @@ class XPoster:
             raise ValueError("X (Twitter) credentials not configured")
         
         # Ensure text fits within character limit (25,000 for Premium accounts)
-        if len(text) > 25000:
-            text = text[:24997] + "..."
+        if len(text) > self.MAX_TWEET_LENGTH:
+            text = text[:self.MAX_TWEET_LENGTH - 3] + "..."
         
         try:
             # Upload media if provided
             media_id = None
             if image_url and self.api:
-                media_id = self._upload_image(image_url)
+                if image_url.startswith(('http://', 'https://')):
+                    media_id = self._upload_image_url(image_url)
+                else:
+                    media_id = self._upload_image_file(image_url)
             
             # Create tweet with or without media
             if media_id:
@@ -139,57 +161,58 @@ class XPoster:
         except:
             return False
     
-    def _upload_image(self, image_path: str) -> Optional[str]:
+    def _upload_image_url(self, image_url: str) -> Optional[str]:
         """
-        Upload image to X and return media ID.
+        Download an image from a URL and upload it to X.
         
         Args:
-            image_path: Local file path or URL of image to upload
+            image_url: URL of image to upload
             
         Returns:
             Media ID string if successful, None otherwise
         """
-        if not self.api:
-            print("Warning: X API v1.1 not initialized, cannot upload media")
-            return None
-        
         try:
-            # Convert relative paths to absolute paths
-            if not os.path.isabs(image_path):
-                image_path = os.path.abspath(image_path)
-            
-            # Check if it's a local file or URL
-            if os.path.isfile(image_path):
-                # Already a local file, upload directly
-                media = self.api.media_upload(filename=image_path)
-                print(f"✓ Uploaded image to X: {media.media_id}")
-                return str(media.media_id)
-            elif image_path.startswith(('http://', 'https://')):
-                # It's a URL, download first
-                response = requests.get(image_path, timeout=30)
+            # Read it into memory and upload from there, with no temporary
+            # file round-trip
+            buffer = io.BytesIO()
+            with self.session.get(image_url, stream=True, timeout=30) as response:
                 response.raise_for_status()
-                
-                # Save to temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-                    tmp_file.write(response.content)
-                    tmp_path = tmp_file.name
-                
-                try:
-                    # Upload to X using v1.1 API
-                    media = self.api.media_upload(filename=tmp_path)
-                    print(f"✓ Uploaded image to X: {media.media_id}")
-                    return str(media.media_id)
-                finally:
-                    # Clean up temporary file
-                    if os.path.exists(tmp_path):
-                        os.remove(tmp_path)
-            else:
-                # File doesn't exist - this is common in CI/CD environments
-                print(f"Warning: Image file not found: '{image_path}'")
-                print("   This is normal when images are missing from artifacts.")
-                print("   Posting without image...")
-                return None
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    buffer.write(chunk)
+            buffer.seek(0)
             
+            # Upload to X using v1.1 API; the filename only sets the media type
+            media = self.api.media_upload(filename='image.jpg', file=buffer)
+            print(f"✓ Uploaded image to X: {media.media_id}")
+            return str(media.media_id)
+        
+        except Exception as e:
+            print(f"Error uploading image to X: {e}")
+            return None
+    
+    def _upload_image_file(self, image_path: str) -> Optional[str]:
+        """
+        Upload a local image file to X.
+        
+        Args:
+            image_path: Local file path of image to upload
+            
+        Returns:
+            Media ID string if successful, None otherwise
+        """
+        try:
+            # A missing file shows up when tweepy opens it, so there's no
+            # separate stat() probe
+            media = self.api.media_upload(filename=image_path)
+            print(f"✓ Uploaded image to X: {media.media_id}")
+            return str(media.media_id)
+        
+        except (FileNotFoundError, IsADirectoryError):
+            # File doesn't exist - this is common in CI/CD environments
+            print(f"Warning: Image file not found: '{os.path.abspath(image_path)}'")
+            print("   This is normal when images are missing from artifacts.")
+            print("   Posting without image...")
+            return None
         except Exception as e:
             print(f"Error uploading image to X: {e}")
             return None